@@ -0,0 +1,55 @@
+"""Benchmark string escaping of the MySQL engine.
+
+Run this script directly to compare :meth:`sqlian.mysql.Engine.escape_string`
+against a per-character reference implementation, for JSON payloads of
+various sizes::
+
+    python benchmarks/escape.py
+"""
+
+import json
+import timeit
+
+from sqlian.mysql import Engine
+
+
+SIZES = [256, 4096, 65536, 1048576]
+
+
+def escape_per_character(engine, value):
+    return ''.join(engine.string_escape_map.get(c, c) for c in value)
+
+
+def make_payload(size, quotes):
+    item = {'name': 'Mosky', 'note': "it's a note\n" if quotes else 'note'}
+    payload = json.dumps([item] * (size // len(json.dumps(item)) + 1))
+    return payload[:size]
+
+
+def main():
+    engine = Engine()
+    print('{:>10} {:>8} {:>14} {:>14}'.format(
+        'size', 'quotes', 'per-char (ms)', 'engine (ms)',
+    ))
+    for size in SIZES:
+        for quotes in (False, True):
+            payload = make_payload(size, quotes)
+            assert (engine.escape_string(payload) ==
+                    escape_per_character(engine, payload))
+            number = max(1, 1048576 // size)
+            reference = min(timeit.repeat(
+                lambda: escape_per_character(engine, payload),
+                number=number, repeat=3,
+            ))
+            current = min(timeit.repeat(
+                lambda: engine.escape_string(payload),
+                number=number, repeat=3,
+            ))
+            print('{:>10d} {:>8} {:>14.4f} {:>14.4f}'.format(
+                size, 'yes' if quotes else 'no',
+                reference / number * 1000, current / number * 1000,
+            ))
+
+
+if __name__ == '__main__':
+    main()
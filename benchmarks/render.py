@@ -0,0 +1,79 @@
+"""Benchmark statement rendering.
+
+Run this script directly to print rendering time, peak memory usage, and the
+number of :class:`sqlian.Sql` instances created, for a bulk INSERT and a
+typical SELECT (requires Python 3.4+ for tracemalloc)::
+
+    python benchmarks/render.py
+"""
+
+import timeit
+import tracemalloc
+
+import sqlian
+from sqlian.standard import Engine
+
+
+ROW_COUNT = 5000
+
+
+def build_insert(engine):
+    return engine.insert('person', values=[
+        {'person_id': i, 'name': 'Person {}'.format(i), 'active': i % 2 == 0}
+        for i in range(ROW_COUNT)
+    ])
+
+
+def build_select(engine):
+    return engine.select(
+        'name', 'occupation',
+        from_='person',
+        where={'main_language': 'Python', 'age >': 20},
+        order_by='name DESC',
+        limit=10,
+    )
+
+
+class SqlCounter(object):
+    """Count :class:`sqlian.Sql` instantiations while active.
+    """
+    def __enter__(self):
+        self.count = 0
+        self._original = sqlian.Sql.__dict__['__new__']
+        original_new = self._original.__get__(None, sqlian.Sql)
+
+        def counting_new(cls, *args, **kwargs):
+            self.count += 1
+            return original_new(cls, *args, **kwargs)
+
+        sqlian.Sql.__new__ = staticmethod(counting_new)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        sqlian.Sql.__new__ = self._original
+
+
+def measure(name, f, number):
+    engine = Engine()
+    seconds = min(timeit.repeat(lambda: f(engine), number=number, repeat=3))
+
+    tracemalloc.start()
+    f(engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with SqlCounter() as counter:
+        f(engine)
+
+    print('{:<8} {:>10.3f} ms {:>10.1f} KiB {:>10d} Sql'.format(
+        name, seconds / number * 1000, peak / 1024, counter.count,
+    ))
+
+
+def main():
+    measure('insert', build_insert, number=5)
+    measure('select', build_select, number=1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,23 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
+
 from setuptools import find_packages, setup
+from setuptools.command.build_py import build_py
+
+
+class BuildPy(build_py):
+    """Leave out modules the running Python cannot compile.
+    """
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 5):   # async/await.
+            modules = [
+                (pkg, mod, path) for pkg, mod, path in modules
+                if (pkg, mod) != ('sqlian', 'aio')
+            ]
+        return modules
 
 
 def get_version():
@@ -34,6 +50,7 @@ setup(
     author_email='uranusjr@gmail.com',
     url='https://github.com/uranusjr/sqlian',
     packages=find_packages(),
+    cmdclass={'build_py': BuildPy},
     install_requires=['six'],
     license='ISC',
     keywords='SQL',
@@ -1,19 +1,25 @@
 from .base import (
-    NativeRow, Parsable, is_single_row,
+    NativeRow, Parsable, Writable, is_single_row,
     Sql, UnescapableError, UnsupportedParameterError,
 )
 from .databases import DuplicateScheme, UnrecognizableScheme, connect, register
-from .records import Record, RecordCollection
+from .pools import Pool, PoolTimeout
+from .records import (
+    ForwardOnlyError, MultipleRecordsError, Query, Record, RecordCollection,
+)
+from .routing import ReplicatedDatabase, ShardedDatabase
 from .standard import star, Database, Engine
 
 
 __all__ = [
-    'NativeRow', 'Parsable', 'is_single_row',
+    'NativeRow', 'Parsable', 'Writable', 'is_single_row',
     'Sql', 'UnescapableError', 'UnsupportedParameterError',
 
-    'Record', 'RecordCollection',
+    'ForwardOnlyError', 'MultipleRecordsError',
+    'Query', 'Record', 'RecordCollection',
 
     'DuplicateScheme', 'UnrecognizableScheme', 'connect', 'register',
+    'Pool', 'PoolTimeout', 'ReplicatedDatabase', 'ShardedDatabase',
     'star', 'Database', 'Engine',
 ]
 
@@ -0,0 +1,397 @@
+"""Use databases with asyncio.
+
+This module requires Python 3.5 or later, and is not imported by default.
+
+.. currentmodule:: sqlian.aio
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import itertools
+import urllib.parse
+
+from .databases import connect as connect_sync
+
+
+__all__ = [
+    'AsyncDatabase', 'AsyncPool', 'AsyncRecordCollection',
+    'connect', 'create_pool',
+]
+
+
+class AsyncRecordCollection(object):
+    """Asynchronous wrapper of a :class:`sqlian.records.RecordCollection`.
+
+    Iterate over this with ``async for``. Records are fetched in batches of
+    `batch_size` on the database's thread pool, and the next batch is
+    fetched in the background while the current one is consumed.
+
+    :param database: The :class:`AsyncDatabase` the records come from.
+    :param collection: The record collection to wrap.
+    :param batch_size: How many records to fetch at a time.
+    """
+    def __init__(self, database, collection, batch_size=100):
+        self._database = database
+        self._collection = collection
+        self._batch_size = batch_size
+        self._iterator = None
+        self._buffer = collections.deque()
+        self._next_batch = None
+        self._exhausted = False
+
+    def __repr__(self):
+        return '<AsyncRecordCollection {}>'.format(
+            repr(self._collection)[1:-1],
+        )
+
+    @property
+    def collection(self):
+        """The wrapped record collection. This property is read-only.
+        """
+        return self._collection
+
+    def _fetch_batch(self):
+        if self._iterator is None:
+            self._iterator = iter(self._collection)
+        return list(itertools.islice(self._iterator, self._batch_size))
+
+    def _prefetch(self):
+        self._next_batch = self._database.run(self._fetch_batch)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer:
+            if self._exhausted:
+                raise StopAsyncIteration
+            if self._next_batch is None:
+                self._prefetch()
+            batch = await self._next_batch
+            self._next_batch = None
+            if len(batch) < self._batch_size:
+                self._exhausted = True
+            else:
+                self._prefetch()
+            if not batch:
+                raise StopAsyncIteration
+            self._buffer.extend(batch)
+        return self._buffer.popleft()
+
+    async def all(self):
+        """Fetch all remaining records into a list.
+        """
+        return [record async for record in self]
+
+    async def first(self, default=None):
+        """See :meth:`sqlian.records.RecordCollection.first`.
+        """
+        return await self._database.run(self._collection.first, default)
+
+    async def one(self, default=None):
+        """See :meth:`sqlian.records.RecordCollection.one`.
+        """
+        return await self._database.run(self._collection.one, default)
+
+    async def scalar(self, default=None):
+        """See :meth:`sqlian.records.RecordCollection.scalar`.
+        """
+        return await self._database.run(self._collection.scalar, default)
+
+    async def close(self):
+        """See :meth:`sqlian.records.RecordCollection.close`.
+        """
+        await self._database.run(self._collection.close)
+
+
+class Transaction(object):
+    """Asynchronous context manager committing or rolling back on exit.
+    """
+    def __init__(self, database):
+        self._database = database
+
+    async def __aenter__(self):
+        return self._database
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            await self._database.commit()
+        else:
+            await self._database.rollback()
+
+
+class AsyncDatabase(object):
+    """Asynchronous wrapper of a :class:`sqlian.standard.Database`.
+
+    Blocking DB-API calls are run on a thread pool dedicated to the wrapped
+    database, so the event loop is never blocked. Query methods are
+    coroutines returning :class:`AsyncRecordCollection` instances.
+
+    Instances implement the asynchronous context manager interface, closing
+    the database on exit, committing automatically if there are no
+    exceptions. Use :meth:`transaction` to commit or roll back a block
+    without closing the database.
+
+    :param database: The database to wrap.
+    :param max_workers: Size of the thread pool. DB-API connections are
+        generally not safe to share between threads; only use more than one
+        worker if the driver allows that.
+    :param batch_size: Default number of records fetched at a time when
+        iterating through a result.
+    """
+    def __init__(self, database, max_workers=1, batch_size=100):
+        self._database = database
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+        )
+        self.batch_size = batch_size
+
+    def __repr__(self):
+        return '<AsyncDatabase {}>'.format(repr(self._database)[1:-1])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            await self.commit()
+        await self.close()
+
+    @property
+    def database(self):
+        """The wrapped database. This property is read-only.
+        """
+        return self._database
+
+    @property
+    def engine(self):
+        return self._database.engine
+
+    def run(self, func, *args, **kwargs):
+        """Run a blocking function on the thread pool.
+
+        :returns: An awaitable future resolving to the function's result.
+        """
+        return asyncio.get_event_loop().run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs),
+        )
+
+    def transaction(self):
+        """Return an asynchronous context manager for a transaction.
+
+        The transaction is committed when the block exits, or rolled back if
+        an exception is raised in it:
+
+        .. code-block:: python
+
+            async with db.transaction():
+                await db.insert('person', values=...)
+        """
+        return Transaction(self)
+
+    async def execute(self, method, args, kwargs):
+        """Call a query method of the wrapped database on the thread pool.
+
+        The result is wrapped in an :class:`AsyncRecordCollection`. A
+        `batch_size` keyword argument, if present, is also used as its batch
+        size.
+        """
+        batch_size = kwargs.get('batch_size') or self.batch_size
+        collection = await self.run(method, *args, **kwargs)
+        return AsyncRecordCollection(self, collection, batch_size)
+
+    async def select(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.select`.
+        """
+        return await self.execute(self._database.select, args, kwargs)
+
+    async def iterate(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.iterate`.
+        """
+        return await self.execute(self._database.iterate, args, kwargs)
+
+    async def insert(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.insert`.
+        """
+        return await self.execute(self._database.insert, args, kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.insert_many`.
+        """
+        return await self.execute(self._database.insert_many, args, kwargs)
+
+    async def update(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.update`.
+        """
+        return await self.execute(self._database.update, args, kwargs)
+
+    async def delete(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.delete`.
+        """
+        return await self.execute(self._database.delete, args, kwargs)
+
+    async def commit(self):
+        await self.run(self._database.commit)
+
+    async def rollback(self):
+        await self.run(self._database.rollback)
+
+    async def close(self):
+        """Close the wrapped database, and shut down the thread pool.
+        """
+        try:
+            await self.run(self._database.close)
+        finally:
+            self._executor.shutdown(wait=False)
+
+
+async def connect(url, max_workers=1, batch_size=100, **kwargs):
+    """Create a database connection, and wrap it for asyncio.
+
+    This works like :func:`sqlian.connect`, but connects on the thread pool
+    of the returned :class:`AsyncDatabase`. The database has one connection,
+    so its queries run one at a time. Use :func:`create_pool` to run
+    concurrent queries on several connections.
+    """
+    database = AsyncDatabase(None, max_workers, batch_size)
+    # Connect on the database's own thread pool, since some drivers (e.g.
+    # sqlite3) only allow a connection to be used in its creating thread.
+    database._database = await database.run(connect_sync, url, **kwargs)
+    return database
+
+
+class PooledDatabase(object):
+    """Asynchronous context manager checking out a database from a pool.
+    """
+    def __init__(self, pool):
+        self._pool = pool
+        self._database = None
+
+    async def __aenter__(self):
+        await self._pool.semaphore.acquire()
+        try:
+            self._database = await self._pool.create_database()
+        except BaseException:
+            self._pool.semaphore.release()
+            raise
+        return self._database
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self._database.commit()
+            else:
+                await self._database.rollback()
+        finally:
+            try:
+                await self._database.close()
+            finally:
+                self._pool.semaphore.release()
+
+
+class AsyncPool(object):
+    """Run concurrent queries, each on its own database.
+
+    Every query (or :meth:`acquire` block) creates a database with
+    `factory`, runs on it in its own transaction, and closes it. Create
+    the databases with a pooled URL (e.g. with the ``pool_size`` option) to
+    reuse connections instead of opening a new one each time.
+    :func:`create_pool` does this for a URL.
+
+    :param factory: A callable taking no arguments, returning a
+        :class:`sqlian.standard.Database`. It is called on a worker thread.
+    :param max_size: Maximum number of databases in use at the same time.
+        Further queries wait for one to be closed.
+    :param batch_size: Default batch size of the databases' results.
+    """
+    def __init__(self, factory, max_size=5, batch_size=100):
+        self._factory = factory
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self._semaphore = None
+
+    def __repr__(self):
+        return '<AsyncPool max_size={}>'.format(self.max_size)
+
+    @property
+    def semaphore(self):
+        # Created on first use, so it belongs to the running event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_size)
+        return self._semaphore
+
+    async def create_database(self):
+        database = AsyncDatabase(None, batch_size=self.batch_size)
+        database._database = await database.run(self._factory)
+        return database
+
+    def acquire(self):
+        """Return an asynchronous context manager for a database.
+
+        The block runs in a transaction, which is committed when the block
+        exits, or rolled back if an exception is raised in it. The database
+        is closed (returning its connection to the pool) afterwards:
+
+        .. code-block:: python
+
+            async with pool.acquire() as db:
+                await db.insert('person', values=...)
+                rows = await (await db.select(from_='person')).all()
+        """
+        return PooledDatabase(self)
+
+    async def execute(self, name, args, kwargs):
+        """Call a query method on a database from the pool.
+
+        The result is fetched completely before the database is closed.
+
+        :param name: Name of the :class:`AsyncDatabase` method to call.
+        :returns: A list of records.
+        """
+        async with self.acquire() as db:
+            collection = await getattr(db, name)(*args, **kwargs)
+            return await collection.all()
+
+    async def select(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.select`.
+        """
+        return await self.execute('select', args, kwargs)
+
+    async def insert(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.insert`.
+        """
+        return await self.execute('insert', args, kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.insert_many`.
+        """
+        return await self.execute('insert_many', args, kwargs)
+
+    async def update(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.update`.
+        """
+        return await self.execute('update', args, kwargs)
+
+    async def delete(self, *args, **kwargs):
+        """See :meth:`sqlian.standard.Database.delete`.
+        """
+        return await self.execute('delete', args, kwargs)
+
+
+def create_pool(url, max_size=5, batch_size=100, **kwargs):
+    """Create an :class:`AsyncPool` of databases connected to a URL.
+
+    If the URL does not have a ``pool_size`` option, it is set to
+    `max_size`, so connections are reused between queries. Other arguments
+    are passed to :func:`sqlian.connect`.
+    """
+    # Append to the string; unsplitting the URL would mangle SQLite paths.
+    query = urllib.parse.urlsplit(url).query
+    if 'pool_size' not in urllib.parse.parse_qs(query):
+        url = '{}{}pool_size={}'.format(url, '&' if query else '?', max_size)
+    return AsyncPool(
+        functools.partial(connect_sync, url, **kwargs),
+        max_size=max_size, batch_size=batch_size,
+    )
@@ -35,6 +35,12 @@ class Sql(six.text_type):
     def __sql__(self, engine):
         return self
 
+    def __sql_write__(self, engine, out):
+        out.append(self)
+
+    def __sql_shape__(self, engine, values):
+        return self
+
     def __hash__(self):
         return six.text_type.__hash__(self)
 
@@ -52,6 +58,20 @@ class Sql(six.text_type):
         ))
 
 
+class Writable(object):
+    """Mixin rendering SQL by writing fragments into a shared buffer.
+
+    Subclasses implement ``__sql_write__(engine, out)`` to append string
+    fragments to the list `out`, passing it on to the engine to write nested
+    constructs. The buffer is only joined into a :class:`Sql` instance once,
+    for the outermost construct being rendered.
+    """
+    def __sql__(self, engine):
+        out = []
+        self.__sql_write__(engine, out)
+        return Sql(''.join(out))
+
+
 def is_single_row(iterable):
     return (
         getattr(iterable, '__single_row__', False) or
@@ -1,9 +1,15 @@
 import collections
 import importlib
 import re
+import threading
 
 import six
 
+from .base import UnsupportedParameterError
+from .pools import Pool
+from .routing import ReplicatedDatabase
+from .utils import parse_boolean
+
 
 __all__ = ['DuplicateScheme', 'UnrecognizableScheme', 'register', 'connect']
 
@@ -66,7 +72,31 @@ register('sqlite3+sqlite', 'sqlian.sqlite.SQLite3Database')
 IN_MEMORY_DB_PATTERN = re.compile(r'^(?P<scheme>\w+)://:memory:$')
 
 
-def connect(url):
+# URL options configuring a connection pool, mapped to Pool arguments.
+POOL_OPTIONS = {
+    'pool_size': ('size', int),
+    'max_overflow': ('max_overflow', int),
+    'pool_timeout': ('timeout', float),
+    'pool_recycle': ('recycle', float),
+    'pool_pre_ping': ('pre_ping', parse_boolean),
+}
+
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+
+def get_pool(key, pool_kwargs):
+    with POOLS_LOCK:
+        try:
+            pool = POOLS[key]
+        except KeyError:
+            pool = POOLS[key] = Pool(**pool_kwargs)
+    return pool
+
+
+def connect(
+        url, replicas=None, replica_strategy='round_robin',
+        sticky_after_write=None, **kwargs):
     """Create a database connection.
 
     The database URL takes the form::
@@ -86,9 +116,47 @@ def connect(url):
       four slashes if you need to specify an absolute path. The default driver
       (built-in `sqlite3`) is used.
 
+    Connections are pooled if any of the following options are present in
+    the URL query, e.g. ``postgresql:///db?pool_size=10&max_overflow=5``.
+    Databases connected with the same URL share a pool, and closing a pooled
+    database returns its connection to the pool. See
+    :class:`sqlian.pools.Pool` for details.
+
+    * ``pool_size``: Number of connections kept in the pool (default 5).
+    * ``max_overflow``: Number of connections allowed beyond the pool size
+      (default 10).
+    * ``pool_timeout``: Seconds to wait for a connection when all are checked
+      out (default 30).
+    * ``pool_recycle``: Replace connections older than this many seconds.
+    * ``pool_pre_ping``: Test connections with ``SELECT 1`` on checkout.
+
+    SQLite databases can also be loaded into memory on connection with
+    ``load_into_memory=1`` (see
+    :meth:`sqlian.sqlite.SQLite3Database.snapshot_to_memory`). Add
+    ``memory_write_back=1`` to save changes back into the file on close.
+
     :param url: URL of the database to connect to.
+    :param replicas: URLs of read replicas of the database. If given, a
+        :class:`sqlian.routing.ReplicatedDatabase` is returned, routing
+        queries to the replicas, and everything else to `url`.
+    :param replica_strategy: How to choose a replica for each query; see
+        :class:`sqlian.routing.ReplicatedDatabase`.
+    :param sticky_after_write: Seconds to route queries to the primary after
+        a write; see :class:`sqlian.routing.ReplicatedDatabase`.
+    :param kwargs: Extra arguments passed to the database class, e.g.
+        ``bind_params``.
     :returns: A :class:`Database` instance with open connection.
     """
+    if replicas:
+        if replica_strategy not in ReplicatedDatabase.strategies:
+            raise UnsupportedParameterError(replica_strategy, 'strategy')
+        return ReplicatedDatabase(
+            connect(url, **kwargs),
+            [connect(replica_url, **kwargs) for replica_url in replicas],
+            strategy=replica_strategy,
+            sticky_after_write=sticky_after_write,
+        )
+
     # Special case sqlite://:memory: because urlsplit chokes on the colons.
     match = IN_MEMORY_DB_PATTERN.match(url)
     if match:
@@ -97,7 +165,7 @@ def connect(url):
             engine_class = ENGINE_CLASSES[scheme]
         except KeyError:
             raise UnrecognizableScheme(scheme)
-        return engine_class(database=':memory:')
+        return engine_class(database=':memory:', **kwargs)
 
     parts = six.moves.urllib.parse.urlsplit(url)
 
@@ -110,7 +178,6 @@ def connect(url):
     if database.startswith('/'):
         database = database[1:]
 
-    kwargs = {}
     if parts.hostname:
         kwargs['host'] = parts.hostname
     if parts.port:
@@ -121,11 +188,33 @@ def connect(url):
         kwargs['username'] = parts.username
     if parts.password:
         kwargs['password'] = parts.password
+
+    snapshot_kwargs = {}
     if parts.query:
         # TODO: The result is late-winning when there are duplicate keys.
         # This seems to be a good strategy to me, but *maybe* we should do
         # something when there are duplicate options?
         query_pairs = six.moves.urllib.parse.parse_qsl(parts.query)
-        kwargs['options'] = collections.OrderedDict(query_pairs)
-
-    return engine_class(**kwargs)
+        options = collections.OrderedDict(query_pairs)
+        if parse_boolean(options.pop('load_into_memory', 'false')):
+            if not hasattr(engine_class, 'snapshot_to_memory'):
+                raise UnsupportedParameterError('load_into_memory', 'option')
+            snapshot_kwargs['write_back'] = parse_boolean(
+                options.pop('memory_write_back', 'false'),
+            )
+        pool_kwargs = {}
+        for key, (name, convert) in POOL_OPTIONS.items():
+            if key in options:
+                pool_kwargs[name] = convert(options.pop(key))
+        if pool_kwargs:
+            pool_url = parts._replace(
+                query=six.moves.urllib.parse.urlencode(list(options.items())),
+            ).geturl()
+            kwargs['pool'] = get_pool((engine_class, pool_url), pool_kwargs)
+        if options:
+            kwargs['options'] = options
+
+    database = engine_class(**kwargs)
+    if snapshot_kwargs:
+        database.snapshot_to_memory(**snapshot_kwargs)
+    return database
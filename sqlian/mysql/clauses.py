@@ -1,7 +1,7 @@
 # Inject everything from standard SQL.
 from sqlian.standard.clauses import *   # noqa
 
-from sqlian import Sql, UnsupportedParameterError
+from sqlian import UnsupportedParameterError
 from sqlian.standard.clauses import __all__, Clause, IdentifierClause
 
 
@@ -28,8 +28,11 @@ class Locking(Clause):
             raise UnsupportedParameterError(mode, 'locking mode')
         self.mode = mode_upper
 
-    def __sql__(self, engine):
-        return Sql(self.mode)
+    def __sql_write__(self, engine, out):
+        out.append(self.mode)
+
+    def __sql_shape__(self, engine, values):
+        return (type(self), self.mode)
 
 
 class ForUpdate(Locking):
@@ -1,3 +1,5 @@
+import importlib
+
 from sqlian import compat
 from sqlian.standard import Database
 from sqlian.utils import parse_boolean
@@ -9,7 +11,22 @@ def noop(value):
     return value
 
 
-class MySQLDBDatabase(Database):
+class ServerSideCursorMixin(object):
+
+    def server_side_cursor(self, batch_size=None):
+        """Return a new unbuffered (SSCursor) cursor.
+
+        The result of a query executed on this cursor must be fully consumed
+        (or the cursor closed) before another query is issued on the same
+        connection.
+        """
+        cursors = importlib.import_module(
+            '{}.cursors'.format(self.dbapi2_module_name),
+        )
+        return self.connection.cursor(cursors.SSCursor)
+
+
+class MySQLDBDatabase(ServerSideCursorMixin, Database):
 
     dbapi2_module_name = 'MySQLdb'
     engine_class = Engine
@@ -39,7 +56,7 @@ class MySQLDBDatabase(Database):
         return dbapi.connect(**kwargs)
 
 
-class PyMySQLDatabase(Database):
+class PyMySQLDatabase(ServerSideCursorMixin, Database):
 
     dbapi2_module_name = 'pymysql'
     engine_class = Engine
@@ -0,0 +1,191 @@
+"""Connection pooling.
+
+.. currentmodule:: sqlian.pools
+"""
+
+import collections
+import threading
+import time
+
+
+__all__ = ['Pool', 'PoolTimeout']
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when a connection cannot be checked out from a :class:`Pool`
+    before the timeout.
+    """
+    def __init__(self, timeout):
+        super(PoolTimeout, self).__init__(
+            'no connection available in pool after {} seconds'.format(
+                timeout,
+            ),
+        )
+
+
+class Pool(object):
+    """A thread-safe pool of DB-API 2.0 connections.
+
+    The pool keeps up to `size` idle connections. If all of them are checked
+    out, up to `max_overflow` extra connections are created, and closed when
+    they are returned. When the limit is reached, :meth:`checkout` blocks
+    until a connection is returned, or `timeout` seconds pass.
+
+    You typically don't need to interact with a pool directly. Pass pool
+    options in the URL to :func:`sqlian.connect` instead, and close the
+    returned :class:`sqlian.standard.Database` to return its connection.
+
+    :param size: Number of connections kept in the pool.
+    :param max_overflow: Number of connections allowed beyond `size`.
+    :param timeout: Seconds to wait for a connection before raising
+        :class:`PoolTimeout`. ``None`` means to wait forever.
+    :param recycle: If given, connections older than this many seconds are
+        closed and replaced on checkout.
+    :param pre_ping: If ``True``, test each connection with a ``SELECT 1`` on
+        checkout, and replace it if the test fails.
+    """
+    def __init__(
+            self, size=5, max_overflow=10, timeout=30,
+            recycle=None, pre_ping=False):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = collections.deque()
+        self._created_at = {}
+        self._checked_out = set()
+        self._count = 0
+
+    def __repr__(self):
+        return '<Pool size={} idle={} open={}>'.format(
+            self.size, len(self._idle), self._count,
+        )
+
+    def ping(self, connection):
+        """Test whether a connection is usable.
+
+        :rtype: bool
+        """
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _acquire(self):
+        """Reserve a slot in the pool.
+
+        Returns an idle connection if there is one, or ``None`` if the caller
+        should create a new connection in the reserved slot.
+        """
+        if self.timeout is not None:
+            deadline = time.time() + self.timeout
+        with self._lock:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._count < self.size + self.max_overflow:
+                    self._count += 1
+                    return None
+                if self.timeout is None:
+                    self._lock.wait()
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise PoolTimeout(self.timeout)
+                self._lock.wait(remaining)
+
+    def _is_stale(self, connection):
+        if self.recycle is not None:
+            age = time.time() - self._created_at[id(connection)]
+            if age > self.recycle:
+                return True
+        return self.pre_ping and not self.ping(connection)
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _release_slot(self):
+        with self._lock:
+            self._count -= 1
+            self._lock.notify()
+
+    def checkout(self, creator):
+        """Check out a connection.
+
+        :param creator: A callable taking no arguments, called to create a
+            new connection if there is no usable idle connection.
+        :raises PoolTimeout: If the pool is exhausted until the timeout.
+        :returns: A DB-API 2.0 connection.
+        """
+        connection = self._acquire()
+        if connection is not None and self._is_stale(connection):
+            self._discard(connection)
+            connection = None
+        if connection is None:
+            try:
+                connection = creator()
+            except Exception:
+                self._release_slot()
+                raise
+            self._created_at[id(connection)] = time.time()
+        with self._lock:
+            self._checked_out.add(id(connection))
+        return connection
+
+    def checkin(self, connection):
+        """Return a checked out connection to the pool.
+
+        The connection is rolled back before being made available again. It
+        is closed instead if it is an overflow connection, or if the rollback
+        fails.
+
+        :raises ValueError: If the connection is not checked out from this
+            pool, e.g. it is already returned.
+        """
+        with self._lock:
+            try:
+                self._checked_out.remove(id(connection))
+            except KeyError:
+                raise ValueError(
+                    'connection {!r} is not checked out from this pool'.format(
+                        connection,
+                    ),
+                )
+        try:
+            connection.rollback()
+        except Exception:
+            reusable = False
+        else:
+            reusable = True
+        with self._lock:
+            if reusable and len(self._idle) < self.size:
+                self._idle.append(connection)
+                self._lock.notify()
+                return
+        self._discard(connection)
+        self._release_slot()
+
+    def dispose(self):
+        """Close all idle connections in the pool.
+
+        Checked out connections are not affected.
+        """
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._count -= len(idle)
+            self._lock.notify_all()
+        for connection in idle:
+            self._discard(connection)
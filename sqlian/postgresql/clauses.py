@@ -1,7 +1,7 @@
 # Inject everything from standard SQL.
 from sqlian.standard.clauses import *   # noqa
 
-from sqlian import Sql, UnsupportedParameterError
+from sqlian import UnsupportedParameterError
 from sqlian.standard.clauses import __all__, Clause
 
 
@@ -38,14 +38,19 @@ class Locking(Clause):
         self.ref = ref
         self.option = option_upper
 
-    def __sql__(self, engine):
-        parts = [Sql('FOR'), Sql(self.strength)]
+    def __sql_write__(self, engine, out):
+        out.append('FOR ')
+        out.append(self.strength)
         if self.ref:
-            parts.append(Sql('OF'))
-            parts.append(engine.as_value(self.ref))
+            out.append(' OF ')
+            engine.write_value(self.ref, out)
         if self.option:
-            parts.append(Sql(self.option))
-        return Sql(' ').join(parts)
+            out.append(' ')
+            out.append(self.option)
+
+    def __sql_shape__(self, engine, values):
+        ref_shape = engine.shape_of(self.ref, values) if self.ref else None
+        return (type(self), self.strength, ref_shape, self.option)
 
 
 class Returning(Clause):
@@ -1,7 +1,14 @@
+import collections
+import itertools
+import uuid
+
 from sqlian import compat
 from sqlian.standard import Database
 
 from .engines import Engine
+from .streams import (
+    COPY_FORMATS, CopyInStream, iter_copy_lines, iter_copy_out,
+)
 
 
 class Psycopg2Database(Database):
@@ -9,6 +16,9 @@ class Psycopg2Database(Database):
     dbapi2_module_name = 'psycopg2'
     engine_class = Engine
 
+    # Rows transferred per round trip when iterating a server-side cursor.
+    itersize = 2000
+
     def connect(self, dbapi, **kwargs):
         with compat.suppress(KeyError):
             kwargs['dbname'] = kwargs.pop('database')
@@ -19,3 +29,110 @@ class Psycopg2Database(Database):
         with compat.suppress(KeyError):
             kwargs.update(kwargs.pop('options'))
         return dbapi.connect(**kwargs)
+
+    def server_side_cursor(self, batch_size=None):
+        """Return a new named cursor, which lives on the server.
+
+        Named cursors can only execute a single SELECT (or similar) query,
+        and must be used inside a transaction.
+        """
+        name = 'sqlian_{}'.format(uuid.uuid4().hex)
+        cursor = self.connection.cursor(name=name)
+        cursor.itersize = self.itersize if batch_size is None else batch_size
+        return cursor
+
+    def format_copy_target(self, table, columns):
+        sql = self.engine.Identifier.parse(table, self.engine).__sql__(
+            self.engine,
+        )
+        if columns:
+            sql = '{} ({})'.format(sql, ', '.join(
+                self.engine.format_identifier(c) for c in columns
+            ))
+        return sql
+
+    def copy_in(self, table, columns=None, rows=(), format='text',
+                buffer_size=65536):
+        """Bulk load rows into a table with ``COPY ... FROM STDIN``.
+
+        Rows are encoded into COPY data as the server reads them, so memory
+        usage is bounded regardless of how many rows there are.
+
+        :param table: Name of the table to load into.
+        :param columns: Column names. Required if rows are mappings, unless
+            the first row's keys should be used.
+        :param rows: An iterable of rows, either sequences or mappings.
+        :param format: ``'text'`` or ``'csv'``.
+        :param buffer_size: Size of each chunk sent to the server.
+        :returns: Number of rows loaded.
+        """
+        if format not in COPY_FORMATS:
+            raise ValueError('unsupported COPY format {!r}'.format(format))
+        rows = iter(rows)
+        try:
+            first_row = next(rows)
+        except StopIteration:   # Nothing to load.
+            return 0
+        rows = itertools.chain([first_row], rows)
+        if columns is None and isinstance(first_row, collections.Mapping):
+            columns = list(first_row.keys())
+
+        sql = 'COPY {} FROM STDIN'.format(
+            self.format_copy_target(table, columns),
+        )
+        if format != 'text':
+            sql = '{} WITH (FORMAT {})'.format(sql, format)
+        stream = CopyInStream(iter_copy_lines(rows, columns, format))
+        cursor = self.cursor()
+        try:
+            cursor.copy_expert(sql, stream, size=buffer_size)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    def copy_out(self, statement_or_table, fileobj=None, format='csv',
+                 header=False, buffer_size=65536):
+        """Export data with ``COPY ... TO STDOUT``.
+
+        The data is formatted by the server, and written as is without
+        creating Python objects for rows.
+
+        :param statement_or_table: A statement (e.g. built by
+            ``db.engine.statements.Select``), or SQL, whose result to
+            export. Other strings are taken as the name of a table to export.
+        :param fileobj: A writable file-like object to write the data into.
+            If omitted, a generator yielding chunks of data is returned
+            instead. The COPY runs on a background thread while the generator
+            is consumed; don't use this database until the generator is
+            exhausted or closed.
+        :param format: ``'text'`` or ``'csv'``.
+        :param header: Whether to write a header line (CSV only).
+        :param buffer_size: Size of each chunk read from the server.
+        :returns: Number of rows exported if `fileobj` is given.
+        """
+        if format not in COPY_FORMATS:
+            raise ValueError('unsupported COPY format {!r}'.format(format))
+        if hasattr(statement_or_table, '__sql__'):
+            source = '({})'.format(statement_or_table.__sql__(self.engine))
+        else:
+            source = self.format_copy_target(statement_or_table, None)
+        options = []
+        if format != 'text':
+            options.append('FORMAT {}'.format(format))
+        if header:
+            options.append('HEADER')
+        sql = 'COPY {} TO STDOUT'.format(source)
+        if options:
+            sql = '{} WITH ({})'.format(sql, ', '.join(options))
+
+        def run(fileobj):
+            cursor = self.cursor()
+            try:
+                cursor.copy_expert(sql, fileobj, size=buffer_size)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+        if fileobj is None:
+            return iter_copy_out(run)
+        return run(fileobj)
@@ -5,6 +5,13 @@ class Engine(BaseEngine):
 
     from . import clauses, statements
 
+    # Keep statements (and psycopg2's client-side copies of them) reasonably
+    # sized in memory.
+    insert_max_bytes = 16 * 1024 * 1024
+
+    # NULL is larger than any other value.
+    nulls_first = False
+
     def escape_string(self, value):
         if '\0' in value:   # PostgreSQL doesn't handle NULL byte well?
             raise ValueError('null character in string')
@@ -0,0 +1,163 @@
+"""File-like adapters to stream data through PostgreSQL's COPY.
+"""
+
+import collections
+import datetime
+import threading
+
+import six
+
+
+__all__ = ['CopyInStream', 'CopyOutQueue', 'iter_copy_lines', 'iter_copy_out']
+
+
+COPY_FORMATS = ('text', 'csv')
+
+# Characters escaped with a backslash in COPY's text format.
+TEXT_ESCAPE_PAIRS = [
+    ('\\', '\\\\'), ('\n', '\\n'), ('\r', '\\r'), ('\t', '\\t'),
+]
+
+
+def to_text(value):
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, six.binary_type):
+        return value.decode('utf-8')
+    return six.text_type(value)
+
+
+def encode_text_value(value):
+    if value is None:
+        return '\\N'
+    value = to_text(value)
+    for c, escaped in TEXT_ESCAPE_PAIRS:
+        if c in value:
+            value = value.replace(c, escaped)
+    return value
+
+
+def encode_csv_value(value):
+    if value is None:
+        return ''   # Unquoted empty field means NULL.
+    if isinstance(value, (six.text_type, six.binary_type)):
+        # Always quote strings so empty strings are not read as NULL.
+        return '"{}"'.format(to_text(value).replace('"', '""'))
+    return to_text(value)
+
+
+def iter_copy_lines(rows, columns=None, format='text'):
+    """Encode rows into lines of COPY data.
+
+    :param rows: An iterable of rows, either sequences or mappings.
+    :param columns: Keys to pick values from mapping rows in.
+    :param format: ``'text'`` or ``'csv'``.
+    """
+    if format == 'text':
+        encode, separator = encode_text_value, '\t'
+    elif format == 'csv':
+        encode, separator = encode_csv_value, ','
+    else:
+        raise ValueError('unsupported COPY format {!r}'.format(format))
+    for row in rows:
+        if isinstance(row, collections.Mapping):
+            row = [row[k] for k in columns]
+        yield separator.join([encode(v) for v in row]) + '\n'
+
+
+class CopyInStream(object):
+    """Read-only file-like object over lines of COPY data.
+
+    Lines are pulled from the iterable as the reader asks for them, so at
+    most about `size` characters (plus one line) are held in memory for a
+    ``read(size)`` call.
+    """
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            try:
+                line = next(self._lines)
+            except StopIteration:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = ''.join(chunks)
+        if size < 0:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+class CopyCancelled(IOError):
+    """Raised into a running COPY when its output is no longer consumed.
+    """
+    def __init__(self):
+        super(CopyCancelled, self).__init__('COPY output consumer is closed')
+
+
+class CopyOutQueue(object):
+    """Write-only file-like object passing written chunks to a bounded queue.
+    """
+    def __init__(self, maxsize):
+        self.queue = six.moves.queue.Queue(maxsize)
+        self.cancelled = False
+
+    def write(self, data):
+        if self.cancelled:
+            raise CopyCancelled()
+        self.queue.put(data)
+
+
+# Marks the end of data in a CopyOutQueue.
+END_OF_COPY = object()
+
+
+def iter_copy_out(run, maxsize=16):
+    """Run a COPY on a background thread, and yield chunks it writes.
+
+    :param run: A callable taking a writable file-like object, running the
+        COPY into it.
+    :param maxsize: Number of chunks buffered before the COPY is paused for
+        the consumer to catch up.
+    """
+    writer = CopyOutQueue(maxsize)
+    errors = []
+
+    def produce():
+        try:
+            run(writer)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            writer.queue.put(END_OF_COPY)
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            chunk = writer.queue.get()
+            if chunk is END_OF_COPY:
+                break
+            yield chunk
+        thread.join()
+        if errors:
+            raise errors[0]
+    finally:
+        # Unblock and stop the COPY if the consumer stops early.
+        writer.cancelled = True
+        while thread.is_alive():
+            try:
+                writer.queue.get(timeout=0.05)
+            except six.moves.queue.Empty:
+                pass
@@ -7,13 +7,54 @@ differences on how things interact with the database.
 .. currentmodule:: sqlian.records
 """
 
+import array
 import collections
+import itertools
 import json
 
 import six
 
 
-__all__ = ['Record', 'RecordCollection']
+__all__ = [
+    'ForwardOnlyError', 'MultipleRecordsError',
+    'Query', 'Record', 'RecordCollection', 'RecordSchema',
+]
+
+
+class ForwardOnlyError(TypeError):
+    """Raised when a streaming :class:`RecordCollection` is used like a
+    sequence, or iterated more than once.
+    """
+    def __init__(self, what):
+        super(ForwardOnlyError, self).__init__(
+            'streaming record collection {}; it only supports iterating '
+            'once'.format(what),
+        )
+
+
+class MultipleRecordsError(ValueError):
+    """Raised by :meth:`RecordCollection.one` if there are multiple records.
+    """
+    def __init__(self):
+        super(MultipleRecordsError, self).__init__(
+            'record collection contains more than one record',
+        )
+
+
+class RecordSchema(object):
+    """Column names shared by records of the same result.
+
+    This is built once per result, so records don't each need to build their
+    own key lookup table. Treat instances as immutable.
+    """
+    __slots__ = ('keys', 'indexes')
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self.indexes = dict(zip(self.keys, range(len(self.keys))))
+
+    def __repr__(self):
+        return 'RecordSchema({!r})'.format(self.keys)
 
 
 class Record(object):
@@ -21,21 +62,28 @@ class Record(object):
 
     You typically don't need to create instances of this class, but interact
     with instances returned by a :class:`sqlian.standard.Database` query.
+
+    :param keys: Column names of the row, either as a sequence, or a
+        :class:`RecordSchema` shared among rows.
+    :param values: Values of the row.
     """
+    __slots__ = ('_schema', '_values')
+
     def __init__(self, keys, values):
-        self._keys = keys
-        self._key_indexes = dict(zip(keys, range(len(keys))))
+        if not isinstance(keys, RecordSchema):
+            keys = RecordSchema(keys)
+        self._schema = keys
         self._values = values
 
     def __repr__(self):
         return '<Record {}>'.format(json.dumps(collections.OrderedDict(zip(
-            self._keys, self._values,
+            self._schema.keys, self._values,
         ))))
 
     def __len__(self):
         """How many columns there are in this row.
         """
-        return len(self._keys)
+        return len(self._schema.keys)
 
     def __eq__(self, other):
         """Test record equality.
@@ -61,14 +109,16 @@ class Record(object):
         """
         # Numeric indexing.
         if isinstance(key, six.integer_types):
-            if key < len(self._keys):
-                return self.values()[key]
+            if key < len(self._schema.keys):
+                return self._values[key]
             raise IndexError(key)
 
         # Key-value access.
-        if key in self._key_indexes:
-            return self._values[self._key_indexes[key]]
-        raise KeyError(key)
+        try:
+            index = self._schema.indexes[key]
+        except KeyError:
+            raise KeyError(key)
+        return self._values[index]
 
     def __getattr__(self, key):
         """Access content in the record.
@@ -78,8 +128,12 @@ class Record(object):
         (the square bracket syntax) if you want to access columns with a
         variable.
         """
-        if key in self._key_indexes:
-            return self._values[self._key_indexes[key]]
+        # Slots are looked up here if they are unset (e.g. during copying).
+        if key not in Record.__slots__:
+            try:
+                return self._values[self._schema.indexes[key]]
+            except KeyError:
+                pass
         raise AttributeError(
             "'Record' object has no attribute {!r}".format(key),
         )
@@ -100,7 +154,7 @@ class Record(object):
 
         This works similarly with the standard mapping interface.
         """
-        return tuple(self._keys)
+        return self._schema.keys
 
     def values(self):
         """Returns a sequence containing values in this row.
@@ -114,64 +168,197 @@ class Record(object):
 
         This works similarly with the standard mapping interface.
         """
-        return zip(self._keys, self._values)
+        return zip(self._schema.keys, self._values)
 
 
 class CursorIterator(object):
     """Helper class to iterate through a cursor.
 
     This class is meant to be used internally to support cursors that does not
-    already provide the iterator interface.
+    already provide the iterator interface, or to fetch rows in batches. If
+    `batch_size` is given, rows are fetched with ``fetchmany()`` and buffered,
+    instead of one by one with ``fetchone()``.
     """
-    def __init__(self, cursor):
+    def __init__(self, cursor, batch_size=None):
         self.cursor = cursor
+        self.batch_size = batch_size
+        self._buffer = collections.deque()
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        row = self.cursor.fetchone()
-        if row is not None:
-            return row
-        raise StopIteration
+        if self.batch_size is None:
+            row = self.cursor.fetchone()
+            if row is not None:
+                return row
+            raise StopIteration
+        if not self._buffer:
+            self._buffer.extend(self.cursor.fetchmany(self.batch_size))
+            if not self._buffer:
+                raise StopIteration
+        return self._buffer.popleft()
 
     # Python 2 compatibility.
     def next(self):
         return self.__next__()
 
 
+try:
+    INTEGER_TYPECODE = array.array('q').typecode
+except ValueError:  # Python 2 does not have long long arrays.
+    INTEGER_TYPECODE = 'l'
+
+
+def infer_typecode(values):
+    """Find an array typecode able to hold all values, or None if there's not.
+    """
+    typecode = None
+    for value in values:
+        if isinstance(value, float):
+            typecode = 'd'
+        elif (isinstance(value, six.integer_types) and
+                not isinstance(value, bool)):
+            typecode = typecode or INTEGER_TYPECODE
+        else:
+            return None
+    return typecode
+
+
+class ColumnBuffer(object):
+    """Accumulate values of a column into a compact buffer.
+
+    The buffer type is inferred from the first batch of values: an integer or
+    floating point :class:`array.array` for numeric columns, or a plain list
+    otherwise. If a later batch does not fit, the buffer is widened (integer
+    to floating point, and anything to list), and the batch retried.
+    """
+    __slots__ = ('values',)
+
+    def __init__(self):
+        self.values = None
+
+    def extend(self, values):
+        if self.values is None:
+            typecode = infer_typecode(values)
+            if typecode is not None:
+                try:
+                    self.values = array.array(typecode, values)
+                except OverflowError:
+                    pass
+                else:
+                    return
+            self.values = list(values)
+            return
+        if isinstance(self.values, list):
+            self.values.extend(values)
+            return
+        size = len(self.values)
+        try:
+            self.values.extend(values)
+        except OverflowError:
+            del self.values[size:]  # Drop values added before failing.
+        except TypeError:
+            del self.values[size:]
+            if (self.values.typecode != 'd' and
+                    infer_typecode(values) is not None):
+                self.values = array.array('d', self.values)
+                self.extend(values)
+                return
+        else:
+            return
+        self.values = self.values.tolist()
+        self.values.extend(values)
+
+    def get_values(self):
+        if self.values is None:
+            return []
+        return self.values
+
+
+def get_cursor_schema(cursor):
+    if isinstance(cursor.description, collections.Sequence):
+        keys = tuple(desc[0] for desc in cursor.description)
+    else:
+        keys = ()
+    return RecordSchema(keys)
+
+
+def iter_records_late_schema(cursor, rows):
+    it = iter(rows)
+    for row in it:
+        schema = get_cursor_schema(cursor)
+        yield Record(schema, row)
+        for row in it:
+            yield Record(schema, row)
+
+
 class RecordCollection(object):
     """A sequence of records.
 
     Record collections are backed by record *generators*. Results are fetched
     on demand. This class conforms to the standard sequence interface, and can
     be seamlessly treated as such.
+
+    If `stream` is ``True``, the collection is forward-only: records are
+    yielded without being kept, so memory usage stays flat regardless of the
+    result size. A streaming collection can only be iterated once, and does
+    not support indexing, :func:`len`, or truth value testing; trying to do
+    any of those raises :class:`ForwardOnlyError`.
     """
-    def __init__(self, record_generator):
+    def __init__(self, record_generator, stream=False):
         self._row_gen = record_generator
         self._resolved_rows = []
         self._pending = True
+        self._stream = stream
+
+        # Set by from_cursor() to fetch rows without building records.
+        self._cursor = None
+        self._cursor_rows = None
+        self._batch_size = None
 
     @classmethod
-    def from_cursor(cls, cursor):
+    def from_cursor(cls, cursor, batch_size=None, stream=False):
         """Create a :class:`RecordCollection` from a DB-API 2.0 cursor.
 
         This method automatically extract useful information for DB-API 2.0
         to generate records. Discrepencies in various interfaces are generally
         taken care of by this method, and you should use it instead of the
         basic constructor when returning records for a database query.
+
+        :param batch_size: If given, rows are fetched from the cursor in
+            batches of this size with ``fetchmany()``, instead of one by one.
+        :param stream: Whether to create a streaming (forward-only)
+            collection.
         """
-        if isinstance(cursor.description, collections.Sequence):
-            keys = tuple(desc[0] for desc in cursor.description)
+        if batch_size is not None:
+            it = CursorIterator(cursor, batch_size)
         else:
-            keys = ()
-        try:
-            it = iter(cursor)
-        except AttributeError:
-            it = CursorIterator(cursor)
-        return cls(Record(keys, row) for row in it)
+            try:
+                it = iter(cursor)
+            except (AttributeError, TypeError):
+                it = CursorIterator(cursor)
+        if cursor.description is None:
+            # Server-side cursors may only describe the result after the
+            # first fetch. Build records after that.
+            collection = cls(
+                iter_records_late_schema(cursor, it), stream=stream,
+            )
+        else:
+            schema = get_cursor_schema(cursor)
+            collection = cls(
+                (Record(schema, row) for row in it), stream=stream,
+            )
+        collection._cursor = cursor
+        collection._cursor_rows = it
+        collection._batch_size = batch_size
+        return collection
 
     def __repr__(self):
+        if self._stream:
+            return '<RecordCollection (streaming, {})>'.format(
+                'pending' if self._pending else 'consumed',
+            )
         parts = []
         if self._resolved_rows:
             parts.append('{}{} rows'.format(
@@ -183,6 +370,14 @@ class RecordCollection(object):
         return '<RecordCollection ({})>'.format(', '.join(parts))
 
     def __iter__(self):
+        if not self._stream:
+            return self._iter_resolving()
+        if not self._pending:
+            raise ForwardOnlyError('is already iterated')
+        self._pending = False
+        return iter(self._row_gen)
+
+    def _iter_resolving(self):
         i = 0
         while True:
             # Exhaust the cached result.
@@ -205,6 +400,8 @@ class RecordCollection(object):
             i += 1
 
     def __getitem__(self, key):
+        if self._stream:
+            raise ForwardOnlyError('does not support indexing')
         slicing = isinstance(key, slice)
         stop = key.stop if slicing else key
 
@@ -223,18 +420,191 @@ class RecordCollection(object):
         return self._resolved_rows[key]
 
     def __len__(self):
+        if self._stream:
+            raise ForwardOnlyError('does not support len()')
         if self._pending:
             for _ in self:  # Resolve everything!
                 pass
         return len(self._resolved_rows)
 
     def __bool__(self):
+        if self._stream:
+            raise ForwardOnlyError('does not support truth value testing')
         return len(self) != 0
 
     # Python 2 compatibility.
     def __nonzero__(self):
         return self.__bool__()
 
+    def close(self):
+        """Discard pending records, and close the underlying cursor.
+
+        Records already fetched are kept. Server resources held for the
+        result are released immediately, instead of when the collection is
+        garbage-collected.
+        """
+        self._pending = False
+        if self._cursor is not None:
+            self._cursor.close()
+        elif hasattr(self._row_gen, 'close'):
+            self._row_gen.close()
+
+    def _take(self, count):
+        """Fetch at most `count` records, and close the collection.
+        """
+        if self._stream:
+            if not self._pending:
+                raise ForwardOnlyError('is already iterated')
+            records = list(itertools.islice(iter(self), count))
+        else:
+            records = list(itertools.islice(self._iter_resolving(), count))
+        self.close()
+        return records
+
+    def first(self, default=None):
+        """Return the first record, or `default` if there are no records.
+
+        At most one record is fetched. The collection is closed afterwards,
+        so pending records are discarded.
+        """
+        records = self._take(1)
+        if not records:
+            return default
+        return records[0]
+
+    def one(self, default=None):
+        """Return the only record, or `default` if there are no records.
+
+        At most two records are fetched. The collection is closed afterwards,
+        so pending records are discarded.
+
+        :raises MultipleRecordsError: If there are more than one records.
+        """
+        records = self._take(2)
+        if len(records) > 1:
+            raise MultipleRecordsError()
+        if not records:
+            return default
+        return records[0]
+
+    def scalar(self, default=None):
+        """Return the first column of the only record, or `default` if there
+        are no records.
+
+        This works like :meth:`one`, but returns only the first value.
+        """
+        record = self.one()
+        if record is None:
+            return default
+        return record[0]
+
+    def _iter_pending_batches(self, batch_size):
+        cursor = self._cursor
+        rows = self._cursor_rows
+        if cursor is None:
+            while True:
+                batch = [
+                    record.values()
+                    for record in itertools.islice(self._row_gen, batch_size)
+                ]
+                if not batch:
+                    return
+                yield batch
+        if isinstance(rows, CursorIterator):
+            if rows._buffer:
+                yield list(rows._buffer)
+                rows._buffer.clear()
+        elif rows is not cursor:
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    return
+                yield batch
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            yield batch
+
+    def to_columns(self, batch_size=None):
+        """Fetch the result into columns.
+
+        Pending rows are fetched from the cursor in batches, and each column
+        is packed into a buffer directly, without building :class:`Record`
+        instances. Integer and floating point columns are stored in
+        :class:`array.array` instances; other columns are stored in lists.
+        The type is inferred from the first batch of rows, and widened when a
+        later batch does not fit.
+
+        Rows fetched this way are not kept as records. If this collection
+        has pending rows, it is consumed after this call, and can't be
+        iterated again.
+
+        :param batch_size: How many rows to fetch at a time. Defaults to the
+            batch size the collection is created with, or 1000.
+        :returns: An ordered mapping of column names to value buffers.
+        """
+        if self._stream and not self._pending:
+            raise ForwardOnlyError('is already iterated')
+        if batch_size is None:
+            batch_size = self._batch_size or 1000
+
+        batches = []
+        if self._resolved_rows:
+            batches.append([r.values() for r in self._resolved_rows])
+        if self._pending:
+            self._pending = False
+            self._stream = True
+            batches = itertools.chain(
+                batches, self._iter_pending_batches(batch_size),
+            )
+
+        keys = None
+        buffers = None
+        for batch in batches:
+            if keys is None:
+                if self._resolved_rows:
+                    keys = self._resolved_rows[0].keys()
+                elif self._cursor is not None:
+                    # Checked after fetching, for server-side cursors.
+                    keys = get_cursor_schema(self._cursor).keys
+                buffers = [ColumnBuffer() for _ in batch[0]]
+            for buf, values in zip(buffers, zip(*batch)):
+                buf.extend(values)
+
+        if keys is None:    # No rows at all.
+            if self._cursor is None:
+                return collections.OrderedDict()
+            keys = get_cursor_schema(self._cursor).keys
+            buffers = [ColumnBuffer() for _ in keys]
+        return collections.OrderedDict(
+            (key, buf.get_values()) for key, buf in zip(keys, buffers)
+        )
+
+    def to_numpy(self, batch_size=None):
+        """Fetch the result into NumPy arrays.
+
+        This works like :meth:`to_columns`, but converts each column into a
+        NumPy array. Integer and floating point columns are converted without
+        copying; other columns become arrays of Python objects. NumPy is
+        required to use this method.
+
+        :returns: An ordered mapping of column names to NumPy arrays.
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('to_numpy() requires NumPy to be installed')
+        columns = self.to_columns(batch_size=batch_size)
+        for key, values in columns.items():
+            if isinstance(values, array.array):
+                columns[key] = numpy.frombuffer(values, dtype=values.typecode)
+            else:
+                array_values = numpy.empty(len(values), dtype=object)
+                array_values[:] = values
+                columns[key] = array_values
+        return columns
+
     # TODO: Handle non-query errors.
     # DB-API states for `fetchone()`, "an Error (or subclass) exception is
     # raised if the previous call to .execute*() did not produce any result
@@ -248,3 +618,198 @@ class RecordCollection(object):
     # For example, INSERT INTO usually is not a query, but can return results
     # with RETURNING; SELECT usually is a query, but doesn't return results if
     # you have an INTO clause). For now we rely on the user to handle this.
+
+
+class Query(object):
+    """A SELECT query that is executed lazily.
+
+    Instances of this class are returned by
+    :meth:`sqlian.standard.Database.select` if ``lazy=True`` is passed. The
+    query is not executed until the result is first iterated, after which
+    this works like the :class:`RecordCollection` of the result. Operations
+    made before that are translated into SQL, so only the data actually used
+    is transferred:
+
+    * Slicing returns a new query, with the slice pushed into its LIMIT and
+      OFFSET clauses. Indexing fetches only the indexed row.
+    * :func:`len` runs a ``SELECT COUNT(*)`` over the same FROM and WHERE
+      clauses. (A query with GROUP BY is executed and counted instead.)
+    * Truth value testing fetches at most one row.
+
+    :param database: The database to execute the query on.
+    :param args: Positional arguments to build the SELECT statement with.
+    :param kwargs: Keyword arguments to build the SELECT statement with.
+        `limit` and `offset`, if given as integers, are kept on the query
+        so slicing can adjust them. `batch_size`, `stream`, and
+        `server_side` are passed on when executing the query.
+    """
+    execute_kwarg_names = ('batch_size', 'stream', 'server_side')
+
+    def __init__(self, database, args, kwargs):
+        kwargs = dict(kwargs)
+        self._database = database
+        self._execute_kwargs = {
+            key: kwargs.pop(key)
+            for key in self.execute_kwarg_names if key in kwargs
+        }
+        self._limit = kwargs.pop('limit', None)
+        self._offset = kwargs.pop('offset', None)
+        self._args = args
+        self._kwargs = kwargs
+        self._result = None
+        self._count = None
+
+    def __repr__(self):
+        if self._result is None:
+            return '<Query (pending)>'
+        return '<Query {}>'.format(repr(self._result)[1:-1])
+
+    def _build(self, limit=None, offset=None, select=None):
+        engine = self._database.engine
+        clauses = engine.clauses
+        args = self._args
+        kwargs = dict(self._kwargs)
+        if select is not None:
+            # Replace the select list, but keep other clauses.
+            args = tuple(
+                arg for arg in args
+                if isinstance(arg, clauses.Clause) and
+                not isinstance(arg, clauses.Select)
+            )
+            kwargs['select'] = select
+        elif not args and 'select' not in kwargs:
+            kwargs['select'] = engine.star
+        if limit is not None:
+            kwargs['limit'] = limit
+        if offset:
+            kwargs['offset'] = offset
+            # Some databases only accept OFFSET after LIMIT.
+            if (limit is None and engine.unbounded_limit is not None and
+                    not any(isinstance(a, clauses.Limit) for a in args)):
+                kwargs['limit'] = engine.unbounded_limit
+        return engine.build_statement(engine.statements.Select, args, kwargs)
+
+    def _run(self, statement, **kwargs):
+        return self._database.execute_query(
+            self._database.engine.render, (statement,), kwargs,
+        )
+
+    def execute(self):
+        """Execute the query, and return the resulting record collection.
+
+        The query is executed only once; the same collection is returned on
+        subsequent calls.
+
+        :rtype: RecordCollection
+        """
+        if self._result is None:
+            self._result = self._run(
+                self._build(limit=self._limit, offset=self._offset),
+                **self._execute_kwargs
+            )
+        return self._result
+
+    def can_push_down(self):
+        return (
+            isinstance(self._limit, (six.integer_types, type(None))) and
+            isinstance(self._offset, (six.integer_types, type(None))) and
+            not any(
+                isinstance(arg, (
+                    self._database.engine.clauses.Limit,
+                    self._database.engine.clauses.Offset,
+                ))
+                for arg in self._args
+            )
+        )
+
+    def __iter__(self):
+        return iter(self.execute())
+
+    def __getitem__(self, key):
+        if self._result is not None or not self.can_push_down():
+            return self.execute()[key]
+        if not isinstance(key, slice):
+            if key < 0:
+                return self.execute()[key]
+            try:
+                return next(iter(self[key:key + 1]))
+            except StopIteration:
+                raise IndexError(key)
+
+        start, stop = key.start or 0, key.stop
+        if key.step not in (None, 1) or start < 0 or (stop or 0) < 0:
+            return self.execute()[key]
+        limits = [
+            max(n - start, 0) for n in (stop, self._limit) if n is not None
+        ]
+        query = type(self)(self._database, self._args, self._kwargs)
+        query._execute_kwargs = self._execute_kwargs
+        query._limit = min(limits) if limits else None
+        query._offset = (self._offset or 0) + start
+        return query
+
+    def __len__(self):
+        if self._result is not None or not self.can_push_down():
+            return len(self.execute())
+        if self._count is None:
+            clauses = self._build().param_clauses
+            if 'group_by' in clauses:
+                return len(self.execute())
+            engine = self._database.engine
+            statement = engine.statements.Select(
+                engine.clauses.Select(engine.Count(engine.star)),
+                *(clauses[key] for key in ('from_', 'where') if key in clauses)
+            )
+            # Sum in case the count comes in parts, e.g. one per shard.
+            count = sum(record[0] for record in self._run(statement))
+            count = max(count - (self._offset or 0), 0)
+            if self._limit is not None:
+                count = min(count, self._limit)
+            self._count = count
+        return self._count
+
+    def __bool__(self):
+        if self._result is not None or not self.can_push_down():
+            return bool(self.execute())
+        if self._count is not None:
+            return self._count != 0
+        if self._limit == 0:
+            return False
+        statement = self._build(limit=1, offset=self._offset, select=1)
+        for _ in self._run(statement):
+            return True
+        return False
+
+    # Python 2 compatibility.
+    def __nonzero__(self):
+        return self.__bool__()
+
+    def _head(self, count):
+        if self._result is not None or not self.can_push_down():
+            return self.execute()
+        return self[:count].execute()
+
+    def first(self, default=None):
+        """Return the first record, or `default` if there are no records.
+
+        See :meth:`RecordCollection.first`. If the query is not yet executed,
+        it is executed with a limit of one row.
+        """
+        return self._head(1).first(default)
+
+    def one(self, default=None):
+        """Return the only record, or `default` if there are no records.
+
+        See :meth:`RecordCollection.one`. If the query is not yet executed,
+        it is executed with a limit of two rows.
+        """
+        return self._head(2).one(default)
+
+    def scalar(self, default=None):
+        """Return the first column of the only record, or `default` if there
+        are no records.
+
+        See :meth:`RecordCollection.scalar`. If the query is not yet
+        executed, it is executed with a limit of two rows.
+        """
+        return self._head(2).scalar(default)
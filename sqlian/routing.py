@@ -0,0 +1,630 @@
+"""Databases routing statements to several underlying databases.
+
+.. currentmodule:: sqlian.routing
+"""
+
+import collections
+import contextlib
+import functools
+import heapq
+import itertools
+import sys
+import threading
+import time
+import zlib
+
+import six
+
+from .base import UnsupportedParameterError, Writable, is_single_row
+from .records import Query, RecordCollection
+from .standard import Database
+from .standard.compositions import List, Ordering
+from .standard.expressions import And, Equal, Identifier, In, Or, Value
+from .standard.statements import Statement
+from .utils import is_non_string_sequence
+
+
+__all__ = ['ReplicatedDatabase', 'ShardedDatabase']
+
+
+class ReplicatedDatabase(Database):
+    """A database routing queries to read replicas.
+
+    Queries (:meth:`select`, :meth:`iterate`, and lazy queries) are executed
+    on one of the replicas. Everything else, including writes, direct cursor
+    access, and queries inside a :meth:`transaction` block, is executed on
+    the primary.
+
+    Instances are usually created by passing `replicas` to
+    :func:`sqlian.connect`.
+
+    :param primary: The primary :class:`sqlian.standard.Database`.
+    :param replicas: A sequence of replica databases.
+    :param strategy: How to choose a replica for a query. ``'round_robin'``
+        cycles through them; ``'least_loaded'`` picks the one with the
+        fewest queries being executed, breaking ties in turn.
+    :param sticky_after_write: If given, queries are executed on the primary
+        for this many seconds after a write, so they can read the written
+        data even if the replicas lag behind.
+    """
+    strategies = ('round_robin', 'least_loaded')
+
+    def __init__(
+            self, primary, replicas, strategy='round_robin',
+            sticky_after_write=None):
+        if strategy not in self.strategies:
+            raise UnsupportedParameterError(strategy, 'strategy')
+        if not replicas:
+            raise ValueError('at least one replica is required')
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.sticky_after_write = sticky_after_write
+        self.engine = primary.engine
+
+        self._lock = threading.Lock()
+        self._turns = itertools.cycle(range(len(self.replicas)))
+        self._loads = [0] * len(self.replicas)
+        self._last_write = None
+        self._transactions = threading.local()
+
+    def __repr__(self):
+        return '<ReplicatedDatabase open={} replicas={}>'.format(
+            'pending' if self.is_pending() else self.is_open(),
+            len(self.replicas),
+        )
+
+    def __getattr__(self, name):
+        # DB-API exception classes, etc.
+        if name == 'primary':
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    @property
+    def connection(self):
+        """The connection of the primary. This property is read-only.
+        """
+        return self.primary.connection
+
+    def get_dbapi2(self):
+        return self.primary.get_dbapi2()
+
+    def is_open(self):
+        return self.primary.is_open()
+
+    def is_pending(self):
+        return self.primary.is_pending()
+
+    def mark_write(self):
+        """Record a write, starting the sticky-after-write window.
+        """
+        self._last_write = time.time()
+
+    def is_sticky(self):
+        """Whether queries should currently go to the primary.
+
+        :rtype: bool
+        """
+        if getattr(self._transactions, 'depth', 0):
+            return True
+        if self.sticky_after_write is None or self._last_write is None:
+            return False
+        return time.time() - self._last_write < self.sticky_after_write
+
+    def choose_replica(self):
+        """Choose a replica index to execute a query on.
+        """
+        with self._lock:
+            turn = next(self._turns)
+            if self.strategy == 'round_robin':
+                return turn
+            # Least loaded, starting from this turn to break ties.
+            count = len(self.replicas)
+            order = [(turn + i) % count for i in range(count)]
+            return min(order, key=lambda i: self._loads[i])
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Context manager for an explicit transaction on the primary.
+
+        Queries inside the block are executed on the primary. This only
+        applies to the thread running the block; queries from other threads
+        are still routed to replicas. The transaction is committed when the
+        block exits, or rolled back if an exception is raised in it.
+        """
+        depth = getattr(self._transactions, 'depth', 0)
+        self._transactions.depth = depth + 1
+        try:
+            yield self
+        except Exception:
+            self._transactions.depth = depth
+            self.rollback()
+            raise
+        self._transactions.depth = depth
+        self.commit()
+
+    # Things executed on the primary.
+
+    def close(self):
+        """Close the primary and all replicas.
+        """
+        for database in [self.primary] + self.replicas:
+            if database.is_open() or database.is_pending():
+                database.close()
+
+    def commit(self):
+        self.primary.commit()
+
+    def rollback(self):
+        self.primary.rollback()
+
+    def savepoint(self, name='sqlian_savepoint'):
+        self.mark_write()
+        return self.primary.savepoint(name)
+
+    def cursor(self):
+        # We can't tell what is done with the cursor. Assume a write.
+        self.mark_write()
+        return self.primary.cursor()
+
+    def server_side_cursor(self, batch_size=None):
+        return self.primary.server_side_cursor(batch_size=batch_size)
+
+    def execute_statement(
+            self, statement_builder, args, kwargs, connection=None):
+        result = self.primary.execute_statement(
+            statement_builder, args, kwargs, connection=connection,
+        )
+        self.mark_write()
+        return result
+
+    def insert_many(self, *args, **kwargs):
+        result = self.primary.insert_many(*args, **kwargs)
+        self.mark_write()
+        return result
+
+    # Things executed on replicas.
+
+    def execute_query(self, statement_builder, args, kwargs):
+        if self.is_sticky():
+            return self.primary.execute_query(statement_builder, args, kwargs)
+        index = self.choose_replica()
+        with self._lock:
+            self._loads[index] += 1
+        try:
+            return self.replicas[index].execute_query(
+                statement_builder, args, kwargs,
+            )
+        finally:
+            with self._lock:
+                self._loads[index] -= 1
+
+
+def run_in_parallel(functions):
+    """Call functions on separate threads, and return their results in order.
+
+    If any of the calls raises, the first exception (in order of the
+    functions) is re-raised after all calls finish.
+    """
+    if len(functions) == 1:
+        return [functions[0]()]
+    results = [None] * len(functions)
+    errors = [None] * len(functions)
+
+    def run(index):
+        try:
+            results[index] = functions[index]()
+        except Exception:
+            errors[index] = sys.exc_info()
+
+    threads = [
+        threading.Thread(target=run, args=(i,))
+        for i in range(len(functions))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for exc_info in errors:
+        if exc_info is not None:
+            six.reraise(*exc_info)
+    return results
+
+
+def compare_sort_values(a, b, nulls_first):
+    if a is None or b is None:
+        result = (a is not None) - (b is not None)
+        return result if nulls_first else -result
+    return (a > b) - (a < b)
+
+
+class SortKey(object):
+    """Key to merge records in an ORDER BY with mixed directions.
+    """
+    __slots__ = ('values', 'descendings', 'nulls_first', 'record')
+
+    def __init__(self, values, descendings, nulls_first, record):
+        self.values = values
+        self.descendings = descendings
+        self.nulls_first = nulls_first
+        self.record = record
+
+    def __lt__(self, other):
+        for a, b, descending in zip(
+                self.values, other.values, self.descendings):
+            result = compare_sort_values(a, b, self.nulls_first)
+            if result:
+                return (result > 0) if descending else (result < 0)
+        return False
+
+
+def get_integer_argument(clause):
+    value = clause.children[0] if len(clause.children) == 1 else None
+    if isinstance(value, Value):
+        value = value.wrapped
+    if not isinstance(value, six.integer_types):
+        raise ValueError('cannot shard {!r}'.format(clause))
+    return value
+
+
+class ShardedDatabase(Database):
+    """A database partitioning rows across several databases by a key.
+
+    Each row lives in the shard chosen by calling `shard_function` with the
+    value of its `shard_key` column. Rows to insert are routed this way. A
+    SELECT, UPDATE, or DELETE statement whose WHERE clause pins the shard
+    key to values (with ``=`` or ``IN``, combined with ``AND`` or ``OR``) is
+    executed on the shards holding those values only. Other statements are
+    executed on all shards in parallel.
+
+    Results from several shards are concatenated. If the query has an ORDER
+    BY clause on plain columns, results are merge-sorted instead, and LIMIT
+    and OFFSET are applied to the merged result. Merge-sorting requires the
+    engine to declare how NULL is ordered (see `nulls_first` on the engine).
+    Other clauses, e.g. aggregates and GROUP BY, are evaluated on each shard
+    separately, and are not combined.
+
+    Shards are committed and rolled back one by one, so a transaction across
+    shards is not atomic.
+
+    :param shards: A sequence of :class:`sqlian.standard.Database`
+        instances, all of the same kind. Since statements are executed on
+        several threads, their connections must allow that (e.g. SQLite
+        databases need ``check_same_thread=false``).
+    :param shard_key: Name of the column deciding the shard of a row.
+    :param shard_function: A callable taking a shard key value, and
+        returning the index of the shard it belongs to. By default the value
+        is converted to text and hashed with CRC-32, so the assignment is
+        stable across processes.
+    """
+    def __init__(self, shards, shard_key, shard_function=None):
+        if not shards:
+            raise ValueError('at least one shard is required')
+        self.shards = list(shards)
+        self.shard_key = shard_key
+        self.shard_function = shard_function or self.hash_shard_key
+        self.engine = self.shards[0].engine
+
+    def __repr__(self):
+        return '<ShardedDatabase open={} shards={}>'.format(
+            'pending' if self.is_pending() else self.is_open(),
+            len(self.shards),
+        )
+
+    def __getattr__(self, name):
+        # DB-API exception classes. Nothing else is shared between shards.
+        if name == 'shards' or not name[:1].isupper():
+            raise AttributeError(name)
+        return getattr(self.shards[0], name)
+
+    def hash_shard_key(self, value):
+        """Default shard function.
+        """
+        hashed = zlib.crc32(six.text_type(value).encode('utf-8'))
+        return (hashed & 0xffffffff) % len(self.shards)
+
+    @property
+    def connection(self):
+        # Also reached by cursor() and server_side_cursor().
+        raise TypeError(
+            'sharded database has no single connection; use its shards',
+        )
+
+    def savepoint(self, name='sqlian_savepoint'):
+        raise TypeError(
+            'sharded database cannot set a savepoint; use its shards',
+        )
+
+    def get_dbapi2(self):
+        return self.shards[0].get_dbapi2()
+
+    def is_open(self):
+        return all(shard.is_open() for shard in self.shards)
+
+    def is_pending(self):
+        return any(shard.is_pending() for shard in self.shards)
+
+    def close(self):
+        """Close all shards.
+        """
+        for shard in self.shards:
+            if shard.is_open() or shard.is_pending():
+                shard.close()
+
+    def commit(self):
+        for shard in self.shards:
+            shard.commit()
+
+    def rollback(self):
+        for shard in self.shards:
+            shard.rollback()
+
+    # Routing.
+
+    def is_shard_key(self, value):
+        return (
+            isinstance(value, Identifier) and
+            value.qualified_parts[-1] == self.shard_key
+        )
+
+    def get_pinned_values(self, condition):
+        """Find values of the shard key that matching rows can have.
+
+        :returns: A list of values, or ``None`` if `condition` does not pin
+            the shard key.
+        """
+        if isinstance(condition, (Equal, In)) and len(condition.operands) == 2:
+            key, value = condition.operands
+            if isinstance(condition, Equal) and not self.is_shard_key(key):
+                key, value = value, key     # Written as `value = key`.
+            if not self.is_shard_key(key):
+                return None
+            if isinstance(condition, Equal):
+                values = [value]
+            elif isinstance(value, List):
+                values = value.args
+            else:
+                return None
+            if any(isinstance(v, Writable) and not isinstance(v, Value)
+                   for v in values):
+                return None     # Not a literal, e.g. a column or subquery.
+            return [v.wrapped if isinstance(v, Value) else v for v in values]
+        if isinstance(condition, And):
+            pinned = None
+            for operand in condition.operands:
+                values = self.get_pinned_values(operand)
+                if values is None:
+                    continue
+                if pinned is None:
+                    pinned = values
+                else:
+                    pinned = [v for v in pinned if v in values]
+            return pinned
+        if isinstance(condition, Or):
+            pinned = []
+            for operand in condition.operands:
+                values = self.get_pinned_values(operand)
+                if values is None:
+                    return None
+                pinned.extend(values)
+            return pinned
+        return None
+
+    def get_shard_indexes(self, statement):
+        """Find indexes of shards a statement needs to be executed on.
+        """
+        where = statement.param_clauses.get('where')
+        if where is None:
+            return list(range(len(self.shards)))
+        values = self.get_pinned_values(And(*where.children))
+        if values is None:
+            return list(range(len(self.shards)))
+        return sorted(set(self.shard_function(v) for v in values))
+
+    def get_merge_key(self, order_by):
+        nulls_first = self.engine.nulls_first
+        if nulls_first is None:
+            raise ValueError(
+                'cannot merge results ordered by {!r}; NULL ordering of '
+                'the engine is unknown'.format(order_by),
+            )
+        names = []
+        descendings = []
+        for child in order_by.children:
+            descending = False
+            if isinstance(child, Ordering):
+                child, descending = child.expression, child.order == 'DESC'
+            if not isinstance(child, Identifier):
+                raise ValueError('cannot merge results ordered by {!r}'.format(
+                    child,
+                ))
+            names.append(child.qualified_parts[-1])
+            descendings.append(descending)
+
+        def key(record):
+            return SortKey(
+                [record[n] for n in names], descendings, nulls_first, record,
+            )
+
+        return key
+
+    def execute_sharded(self, statement, kwargs, method_name):
+        """Execute a statement on shards it is routed to.
+
+        :param method_name: Name of the shard method to execute the statement
+            with, e.g. ``'execute_query'``.
+        :rtype: RecordCollection
+        """
+        indexes = self.get_shard_indexes(statement)
+        stream = kwargs.get('stream', False)
+        if len(indexes) == 1:
+            shard = self.shards[indexes[0]]
+            return getattr(shard, method_name)(
+                shard.engine.render, (statement,), kwargs,
+            )
+
+        clauses = statement.param_clauses
+        order_by = clauses.get('order_by')
+        merge_key = None if order_by is None else self.get_merge_key(order_by)
+        limit = offset = None
+        if 'limit' in clauses or 'offset' in clauses:
+            # Each shard needs to return enough rows to fill the whole page.
+            offset = 0
+            if 'offset' in clauses:
+                offset = get_integer_argument(clauses['offset'])
+            if 'limit' in clauses:
+                limit = get_integer_argument(clauses['limit'])
+            statement = type(statement)(*(
+                clause for key, clause in clauses.items()
+                if key not in ('limit', 'offset')
+            ))
+            if limit is not None:
+                limit_clause = self.engine.clauses.Limit(limit + offset)
+                statement.param_clauses['limit'] = limit_clause
+
+        results = run_in_parallel([
+            functools.partial(
+                getattr(self.shards[i], method_name),
+                self.shards[i].engine.render, (statement,), dict(kwargs),
+            )
+            for i in indexes
+        ])
+        if merge_key is None:
+            records = itertools.chain.from_iterable(results)
+        else:
+            records = (k.record for k in heapq.merge(*(
+                six.moves.map(merge_key, r) for r in results
+            )))
+        if offset is not None:
+            records = itertools.islice(
+                records, offset, None if limit is None else offset + limit,
+            )
+        return RecordCollection(records, stream=stream)
+
+    def build_and_execute(self, statement_class, args, kwargs, method_name):
+        execute_kwargs = {
+            key: kwargs.pop(key)
+            for key in Query.execute_kwarg_names if key in kwargs
+        }
+        statement = self.engine.build_statement(statement_class, args, kwargs)
+        return self.execute_sharded(statement, execute_kwargs, method_name)
+
+    def execute_statement(
+            self, statement_builder, args, kwargs, connection=None):
+        """Execute a statement on the shards it is routed to.
+
+        Only statements built beforehand (passed with the engine's `render`
+        as the builder) can be routed. Others are executed on all shards.
+        """
+        if connection is not None:
+            raise ValueError('cannot execute on a sharded connection')
+        return self.route_statement(
+            statement_builder, args, kwargs, 'execute_statement',
+        )
+
+    def execute_query(self, statement_builder, args, kwargs):
+        return self.route_statement(
+            statement_builder, args, kwargs, 'execute_query',
+        )
+
+    def route_statement(self, statement_builder, args, kwargs, method_name):
+        if (statement_builder == self.engine.render and len(args) == 1 and
+                isinstance(args[0], Statement)):
+            return self.execute_sharded(args[0], kwargs, method_name)
+        results = run_in_parallel([
+            functools.partial(
+                getattr(shard, method_name),
+                statement_builder, args, dict(kwargs),
+            )
+            for shard in self.shards
+        ])
+        return RecordCollection(
+            itertools.chain.from_iterable(results),
+            stream=kwargs.get('stream', False),
+        )
+
+    def select(self, *args, **kwargs):
+        if kwargs.pop('lazy', False):
+            return Query(self, args, kwargs)
+        if not args and 'select' not in kwargs:
+            kwargs['select'] = self.engine.star
+        return self.build_and_execute(
+            self.engine.statements.Select, args, kwargs, 'execute_query',
+        )
+
+    def iterate(self, *args, **kwargs):
+        kwargs['stream'] = True
+        return self.select(*args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self.build_and_execute(
+            self.engine.statements.Update, args, kwargs, 'execute_statement',
+        )
+
+    def delete(self, *args, **kwargs):
+        return self.build_and_execute(
+            self.engine.statements.Delete, args, kwargs, 'execute_statement',
+        )
+
+    def group_rows(self, rows, columns):
+        """Group rows to insert by the index of their shard.
+
+        :returns: An ordered mapping of shard indexes to lists of rows.
+        """
+        groups = collections.OrderedDict()
+        for row in rows:
+            if isinstance(row, collections.Mapping):
+                found = self.shard_key in row
+                if found:
+                    value = row[self.shard_key]
+            else:
+                found = columns is not None and self.shard_key in columns
+                if found:
+                    value = row[list(columns).index(self.shard_key)]
+            if not found:
+                raise ValueError('shard key {!r} is not inserted'.format(
+                    self.shard_key,
+                ))
+            groups.setdefault(self.shard_function(value), []).append(row)
+        return groups
+
+    def insert_sharded(self, method_name, args, kwargs, single):
+        rows = kwargs.pop('values')
+        groups = self.group_rows(rows, kwargs.get('columns'))
+
+        results = run_in_parallel([
+            functools.partial(
+                getattr(self.shards[index], method_name),
+                *args, **dict(kwargs, values=rows[0] if single else rows)
+            )
+            for index, rows in groups.items()
+        ])
+        if len(results) == 1:
+            return results[0]
+        return RecordCollection(itertools.chain.from_iterable(results))
+
+    def insert(self, *args, **kwargs):
+        """Build and execute INSERT statements on the shards of the rows.
+
+        The shard key must be present in the inserted values, either as a
+        key of mapping rows, or in `columns`.
+        """
+        values = kwargs.get('values')
+        single = (
+            isinstance(values, collections.Mapping) or
+            not is_non_string_sequence(values) or is_single_row(values)
+        )
+        if single:
+            kwargs['values'] = [values]
+        return self.insert_sharded('insert', args, kwargs, single)
+
+    def insert_many(self, *args, **kwargs):
+        """Insert many rows on their shards.
+
+        See :meth:`sqlian.standard.Database.insert_many`. Rows are grouped by
+        shard in memory before they are inserted.
+        """
+        kwargs['values'] = list(kwargs['values'])
+        if not kwargs['values']:
+            return RecordCollection(iter([]))
+        return self.insert_sharded('insert_many', args, kwargs, False)
@@ -1,5 +1,5 @@
-from .databases import SQLite3Database
+from .databases import SQLite3ConcurrentDatabase, SQLite3Database
 from .engines import Engine
 
 
-__all__ = ['Engine', 'SQLite3Database']
+__all__ = ['Engine', 'SQLite3ConcurrentDatabase', 'SQLite3Database']
@@ -1,12 +1,283 @@
+import contextlib
+import os
+import re
+import threading
+import weakref
+
+import six
+
+from sqlian import compat
 from sqlian.standard import Database
+from sqlian.utils import parse_boolean
 
 from .engines import Engine
 
 
+# A keyword (e.g. NORMAL), or its numeric equivalent (e.g. 1).
+KEYWORD_PATTERN = re.compile(r'^(?:[A-Za-z_]+|-?\d+)$')
+
+
+def keyword(value):
+    if not KEYWORD_PATTERN.match(value):
+        raise ValueError('invalid PRAGMA value {!r}'.format(value))
+    return value.upper()
+
+
 class SQLite3Database(Database):
+    """SQLite3 database, using the built-in :mod:`sqlite3` module.
 
+    Options (e.g. from the URL query string) named like a PRAGMA in
+    :attr:`pragma_option_converters` are applied with PRAGMA statements on
+    connection, e.g. ``?journal_mode=WAL&mmap_size=268435456``. Other options
+    are passed to :func:`sqlite3.connect`, e.g. ``?cached_statements=512``.
+    """
     dbapi2_module_name = 'sqlite3'
     engine_class = Engine
 
+    # Options passed to sqlite3.connect().
+    connect_option_converters = {
+        'timeout': float,
+        'detect_types': int,
+        'check_same_thread': parse_boolean,
+        'cached_statements': int,
+        'uri': parse_boolean,
+    }
+
+    # Options applied as PRAGMA statements after connecting, in this order.
+    # The busy timeout goes first so changing the journal mode can wait for
+    # other connections.
+    pragma_option_converters = [
+        ('busy_timeout', int),
+        ('journal_mode', keyword),
+        ('synchronous', keyword),
+        ('cache_size', int),
+        ('mmap_size', int),
+        ('temp_store', keyword),
+        ('foreign_keys', parse_boolean),
+    ]
+
+    # Options only meaningful for a database file. These are not applied to
+    # the in-memory copy made by snapshot_to_memory().
+    file_only_options = ('journal_mode', 'mmap_size', 'uri')
+
+    def connect(self, dbapi, database, **kwargs):
+        options = dict(kwargs.get('options') or {})
+        self._connect_options = dict(options)
+        pragmas = []
+        for key, converter in self.pragma_option_converters:
+            if key in options:
+                pragmas.append((key, converter(options.pop(key))))
+
+        # See documentation of the sqlite3 module for valid parameters. Other
+        # options are passed as is, and rejected by sqlite3 if invalid.
+        # https://docs.python.org/3/library/sqlite3.html#sqlite3.connect
+        connect_kwargs = {}
+        for key, value in options.items():
+            with compat.suppress(KeyError):
+                value = self.connect_option_converters[key](value)
+            connect_kwargs[key] = value
+        conn = dbapi.connect(database, **connect_kwargs)
+        try:
+            for key, value in pragmas:
+                if isinstance(value, bool):
+                    value = int(value)
+                conn.execute('PRAGMA {} = {}'.format(key, value)).close()
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def savepoint(self, name='sqlian_savepoint'):
+        # A SAVEPOINT outside a transaction starts one, which is committed
+        # when the savepoint is released. Begin the transaction explicitly so
+        # it is left open, unless the connection is in autocommit mode.
+        conn = self.connection
+        if conn.isolation_level is not None and not conn.in_transaction:
+            conn.execute('BEGIN')
+        return super(SQLite3Database, self).savepoint(name)
+
+    def snapshot_to_memory(self, progress=None, pages=None, write_back=False):
+        """Copy the database into memory, and use the copy from now on.
+
+        The copy is made with SQLite's online backup API (Python 3.7 or later
+        is required). Only committed data is copied. The in-memory database
+        is connected with the same options as the file, except those in
+        :attr:`file_only_options`.
+
+        :param progress: A callable, called after each step of the copy with
+            three arguments: the status of the step, the number of pages
+            remaining, and the total number of pages.
+        :param pages: Number of pages to copy in each step. Defaults to 1 if
+            `progress` is given, so progress is reported page by page, and
+            all pages at once otherwise.
+        :param write_back: If ``True``, the file is kept open, and the
+            in-memory database (including uncommitted changes) is copied back
+            into it when this database is closed. Otherwise the file is
+            closed immediately, and changes are lost on close.
+        """
+        if self._pool is not None:
+            raise ValueError('cannot snapshot a pooled connection')
+        if pages is None:
+            pages = -1 if progress is None else 1
+        source = self.connection
+        options = {
+            key: value
+            for key, value in getattr(self, '_connect_options', {}).items()
+            if key not in self.file_only_options
+        }
+        memory = self.connect(self.get_dbapi2(), ':memory:', options=options)
+        try:
+            source.backup(memory, pages=pages, progress=progress)
+        except Exception:
+            memory.close()
+            raise
+        if write_back:
+            self._snapshot_source = source
+        else:
+            source.close()
+        self._conn = memory
+
+    def close(self):
+        """Close the connection.
+
+        If :meth:`snapshot_to_memory` is called with `write_back`, the
+        in-memory database is committed and copied back to the file first.
+        """
+        source = getattr(self, '_snapshot_source', None)
+        if source is not None:
+            self._snapshot_source = None
+            try:
+                self._conn.commit()
+                self._conn.backup(source)
+            finally:
+                source.close()
+        super(SQLite3Database, self).close()
+
+
+class ReaderHolder(object):
+    """Holds the read-only connection of a thread.
+
+    This is only referenced from thread-local storage, so it is collected
+    when the thread ends, which closes the connection.
+    """
+    __slots__ = ('connection', '__weakref__')
+
+    def __init__(self, connection):
+        self.connection = connection
+
+
+class SQLite3ConcurrentDatabase(SQLite3Database):
+    """SQLite3 database with concurrent read-only connections.
+
+    Writes are executed on a single connection, serialized with a lock, and
+    can be done from any thread. Queries (:meth:`select`, :meth:`iterate`,
+    and lazy queries) are routed to a read-only connection opened for each
+    thread, so they can run in parallel. Read-only connections only see
+    committed changes, and are closed when their threads end. Consume
+    query results before the thread ends.
+
+    The journal mode defaults to WAL, so readers and the writer do not block
+    each other. An in-memory database is not supported because it cannot be
+    shared between connections.
+    """
+    def __init__(self, *args, **kwargs):
+        self._write_lock = threading.RLock()
+        self._readers = threading.local()
+        self._reader_refs = {}
+        self._reader_args = None
+        super(SQLite3ConcurrentDatabase, self).__init__(*args, **kwargs)
+
     def connect(self, dbapi, database, **kwargs):
-        return dbapi.connect(database)
+        if database == ':memory:':
+            raise ValueError('cannot open concurrent in-memory database')
+        options = dict(kwargs.get('options') or {})
+        options.setdefault('journal_mode', 'WAL')
+
+        # Readers share the options, except for those changing the file.
+        reader_options = {
+            key: value for key, value in options.items()
+            if key not in ('journal_mode', 'synchronous', 'uri')
+        }
+        reader_options['uri'] = 'true'
+        reader_options['check_same_thread'] = 'false'
+        uri = 'file:{}?mode=ro'.format(six.moves.urllib.parse.quote(
+            os.path.abspath(database),
+        ))
+        self._reader_args = (dbapi, uri, reader_options)
+
+        options['check_same_thread'] = 'false'
+        return super(SQLite3ConcurrentDatabase, self).connect(
+            dbapi, database, options=options,
+        )
+
+    def snapshot_to_memory(self, *args, **kwargs):
+        raise ValueError('cannot snapshot a concurrent database')
+
+    def reader_connection(self):
+        """Return the read-only connection of the current thread.
+
+        The connection is opened on first call in each thread.
+        """
+        holder = getattr(self._readers, 'holder', None)
+        if holder is None:
+            self.connection     # Establish the writer (and the database).
+            dbapi, uri, options = self._reader_args
+            conn = super(SQLite3ConcurrentDatabase, self).connect(
+                dbapi, uri, options=options,
+            )
+            holder = ReaderHolder(conn)
+            ref = weakref.ref(holder, self._close_reader)
+            with self._write_lock:
+                self._reader_refs[ref] = conn
+            self._readers.holder = holder
+        return holder.connection
+
+    def _close_reader(self, ref):
+        # Called when a thread holding a reader ends.
+        with self._write_lock:
+            conn = self._reader_refs.pop(ref, None)
+        if conn is not None:
+            conn.close()
+
+    def execute_query(self, statement_builder, args, kwargs):
+        kwargs.pop('server_side', None)
+        return self.execute_statement(
+            statement_builder, args, kwargs,
+            connection=self.reader_connection(),
+        )
+
+    def execute_statement(
+            self, statement_builder, args, kwargs, connection=None):
+        if connection is not None:
+            return super(SQLite3ConcurrentDatabase, self).execute_statement(
+                statement_builder, args, kwargs, connection=connection,
+            )
+        with self._write_lock:
+            return super(SQLite3ConcurrentDatabase, self).execute_statement(
+                statement_builder, args, kwargs,
+            )
+
+    @contextlib.contextmanager
+    def savepoint(self, name='sqlian_savepoint'):
+        # Keep other threads' writes out of the savepoint.
+        with self._write_lock:
+            with super(SQLite3ConcurrentDatabase, self).savepoint(name):
+                yield self
+
+    def commit(self):
+        with self._write_lock:
+            super(SQLite3ConcurrentDatabase, self).commit()
+
+    def rollback(self):
+        with self._write_lock:
+            super(SQLite3ConcurrentDatabase, self).rollback()
+
+    def close(self):
+        """Close the writer connection and all read-only connections.
+        """
+        with self._write_lock:
+            reader_refs, self._reader_refs = self._reader_refs, {}
+            self._readers = threading.local()
+            for conn in reader_refs.values():
+                conn.close()
+            super(SQLite3ConcurrentDatabase, self).close()
@@ -3,6 +3,16 @@ from sqlian.standard.engines import Engine as BaseEngine
 
 class Engine(BaseEngine):
 
+    # SQLITE_MAX_COMPOUND_SELECT and SQLITE_MAX_VARIABLE_NUMBER defaults.
+    insert_chunk_size = 500
+    insert_max_params = 999
+
+    # NULL is smaller than any other value.
+    nulls_first = True
+
+    # A negative LIMIT means no limit.
+    unbounded_limit = -1
+
     def escape_string(self, value):
         if '\0' in value:   # SQLite doesn't handle NULL byte well?
             raise ValueError('null character in string')
@@ -2,7 +2,7 @@ import collections
 
 import six
 
-from sqlian import Parsable, Sql, is_single_row
+from sqlian import Parsable, Writable, is_single_row
 from sqlian.utils import (
     is_flat_tuple, is_flat_two_tuple,
     is_non_string_sequence, is_partial_of,
@@ -26,7 +26,7 @@ __all__ = [
 ]
 
 
-class Clause(Parsable):
+class Clause(Writable, Parsable):
 
     def __init__(self, *children):
         super(Clause, self).__init__()
@@ -38,13 +38,19 @@ class Clause(Parsable):
             ', '.join(repr(c) for c in self.children),
         )
 
-    def __sql__(self, engine):
+    def __sql_write__(self, engine, out):
         if not self.children:
-            return self.sql_name
-        arg_sql = Sql(', ').join(engine.as_value(c) for c in self.children)
-        if not self.sql_name:
-            return arg_sql
-        return Sql('{} {}').format(Sql(self.sql_name), arg_sql)
+            out.append(self.sql_name)
+            return
+        if self.sql_name:
+            out.append(self.sql_name)
+            out.append(' ')
+        engine.write_values(self.children, out)
+
+    def __sql_shape__(self, engine, values):
+        return (type(self),) + tuple(
+            engine.shape_of(c, values) for c in self.children
+        )
 
     @classmethod
     def parse(cls, value, engine):
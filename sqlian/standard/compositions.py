@@ -1,4 +1,4 @@
-from sqlian import Sql, UnsupportedParameterError
+from sqlian import UnsupportedParameterError, Writable
 
 
 __all__ = [
@@ -7,7 +7,7 @@ __all__ = [
 ]
 
 
-class Composition(object):
+class Composition(Writable):
 
     def __init__(self, *args):
         super(Composition, self).__init__()
@@ -27,10 +27,16 @@ class As(Composition):
         self.expression = expression
         self.alias = alias
 
-    def __sql__(self, engine):
-        return Sql('{} AS {}').format(
-            engine.as_value(self.expression),
-            engine.as_value(self.alias),
+    def __sql_write__(self, engine, out):
+        engine.write_value(self.expression, out)
+        out.append(' AS ')
+        engine.write_value(self.alias, out)
+
+    def __sql_shape__(self, engine, values):
+        return (
+            type(self),
+            engine.shape_of(self.expression, values),
+            engine.shape_of(self.alias, values),
         )
 
 
@@ -46,18 +52,27 @@ class Ordering(Composition):
         self.expression = expression
         self.order = order_upper
 
-    def __sql__(self, engine):
-        return Sql('{} {}').format(
-            engine.as_value(self.expression),
-            Sql(self.order),
+    def __sql_write__(self, engine, out):
+        engine.write_value(self.expression, out)
+        out.append(' ')
+        out.append(self.order)
+
+    def __sql_shape__(self, engine, values):
+        return (
+            type(self), engine.shape_of(self.expression, values), self.order,
         )
 
 
 class List(Composition):
-    def __sql__(self, engine):
-        return Sql('({})').format(Sql(', ').join(
-            engine.as_value(a) for a in self.args
-        ))
+    def __sql_write__(self, engine, out):
+        out.append('(')
+        engine.write_values(self.args, out)
+        out.append(')')
+
+    def __sql_shape__(self, engine, values):
+        return (type(self),) + tuple(
+            engine.shape_of(a, values) for a in self.args
+        )
 
 
 class Assign(Composition):
@@ -67,10 +82,16 @@ class Assign(Composition):
         self.lho = lho
         self.rho = rho
 
-    def __sql__(self, engine):
-        return Sql('{} = {}').format(
-            engine.as_value(self.lho),
-            engine.as_value(self.rho),
+    def __sql_write__(self, engine, out):
+        engine.write_value(self.lho, out)
+        out.append(' = ')
+        engine.write_value(self.rho, out)
+
+    def __sql_shape__(self, engine, values):
+        return (
+            type(self),
+            engine.shape_of(self.lho, values),
+            engine.shape_of(self.rho, values),
         )
 
 
@@ -111,11 +132,26 @@ class Join(Composition):
         self.join_item = join_item
         self.on_using = on_using
 
-    def __sql__(self, engine):
-        parts = [engine.as_value(self.item)]
+    def __sql_write__(self, engine, out):
+        engine.write_value(self.item, out)
         if self.join_type:
-            parts.append(Sql(self.join_type))
-        parts += [Sql(self.sql_name), engine.as_value(self.join_item)]
+            out.append(' ')
+            out.append(self.join_type)
+        out.append(' ')
+        out.append(self.sql_name)
+        out.append(' ')
+        engine.write_value(self.join_item, out)
+        if self.on_using is not None:
+            out.append(' ')
+            engine.write_value(self.on_using, out)
+
+    def __sql_shape__(self, engine, values):
+        shape = (
+            type(self),
+            engine.shape_of(self.item, values),
+            self.join_type,
+            engine.shape_of(self.join_item, values),
+        )
         if self.on_using is not None:
-            parts.append(engine.as_value(self.on_using))
-        return Sql(' ').join(parts)
+            shape += (engine.shape_of(self.on_using, values),)
+        return shape
@@ -1,8 +1,40 @@
+import collections
+import contextlib
+import copy
+import functools
 import importlib
 import inspect
+import itertools
 
-from sqlian.records import RecordCollection
-from sqlian.utils import is_exception_class
+import six
+
+from sqlian import NativeRow, is_single_row
+from sqlian.records import Query, RecordCollection
+from sqlian.utils import (
+    is_exception_class, is_non_string_sequence, is_values_mapping_sequence,
+)
+
+
+# Estimated size of a non-string literal (numbers, dates, etc.).
+SCALAR_LITERAL_SIZE = 24
+
+
+def estimate_row_size(row):
+    """Estimate the size of a row of values in an INSERT statement.
+
+    This is cheaper than rendering the row. Strings count with their quotes,
+    other values as :data:`SCALAR_LITERAL_SIZE`, plus separators and
+    parentheses around the row.
+    """
+    if not is_non_string_sequence(row):
+        row = [row]
+    size = 4
+    for value in row:
+        if isinstance(value, (six.text_type, six.binary_type)):
+            size += len(value) + 4
+        else:
+            size += SCALAR_LITERAL_SIZE + 2
+    return size
 
 
 class Database(object):
@@ -26,15 +58,40 @@ class Database(object):
     :param username: Username to connect to the database.
     :param password: Password to connect to the database.
     :param options: Database options as a string-string mapping.
+    :param bind_params: If ``True``, values in built statements are passed to
+        the driver as parameters (using the DB-API module's ``paramstyle``)
+        instead of being inlined as escaped literals.
+    :param cache_size: If given, the engine caches up to this many rendered
+        statement shapes, and reuses them for statements differing only in
+        values.
+    :param pool: If given, a :class:`sqlian.pools.Pool` to check out the
+        connection from. Closing the database returns the connection to the
+        pool instead of closing it.
+    :param lazy_connect: If ``True``, the connection is not established (and
+        the DB-API module not imported, unless `bind_params` needs it) until
+        it is first needed, e.g. by :meth:`cursor`, or a query.
 
     .. _`DB-API 2.0`: https://www.python.org/dev/peps/pep-0249
     """
-    def __init__(self, **kwargs):
-        self._conn = self.create_connection(**kwargs)
-        self.engine = self.engine_class()
+    def __init__(
+            self, bind_params=False, cache_size=None, pool=None,
+            lazy_connect=False, **kwargs):
+        self._pool = pool
+        self._conn = None
+        self._connect_kwargs = kwargs
+        if not lazy_connect:
+            self.establish_connection()
+        engine_kwargs = {}
+        if bind_params:
+            engine_kwargs['paramstyle'] = self.get_dbapi2().paramstyle
+        if cache_size is not None:
+            engine_kwargs['cache_size'] = cache_size
+        self.engine = self.engine_class(**engine_kwargs)
 
     def __repr__(self):
-        return '<Database open={}>'.format(self.is_open())
+        return '<Database open={}>'.format(
+            'pending' if self.is_pending() else self.is_open(),
+        )
 
     def __enter__(self):
         return self
@@ -47,7 +104,11 @@ class Database(object):
     @property
     def connection(self):
         """The underlying connection object. This property is read-only.
+
+        The connection is established on access if it is pending.
         """
+        if self._connect_kwargs is not None:
+            self.establish_connection()
         return self._conn
 
     def get_dbapi2(self):
@@ -93,48 +154,135 @@ class Database(object):
         self.populate_dbapi2_members(dbapi)
         return self.connect(dbapi, **kwargs)
 
+    def checkout_connection(self, pool, **kwargs):
+        """Check out a connection from a pool.
+
+        This is called instead of :meth:`create_connection` if the database
+        is created with a pool. A new connection is created with
+        :meth:`connect` if the pool does not have a usable one.
+
+        :returns: A DB-API 2.0 Connection object.
+        """
+        dbapi = self.get_dbapi2()
+        self.populate_dbapi2_members(dbapi)
+        return pool.checkout(functools.partial(self.connect, dbapi, **kwargs))
+
+    def establish_connection(self):
+        """Establish the connection, if it is pending.
+
+        This is called by the constructor, or, if the database is created
+        with `lazy_connect`, when the connection is first needed.
+        """
+        kwargs = self._connect_kwargs
+        if kwargs is None:
+            return
+        if self._pool is None:
+            self._conn = self.create_connection(**kwargs)
+        else:
+            self._conn = self.checkout_connection(self._pool, **kwargs)
+        self._connect_kwargs = None
+
     def is_open(self):
         """Whether the connection is open.
 
+        A pending connection (see `lazy_connect`) is not open.
+
         :rtype: bool
         """
         return self._conn is not None
 
+    def is_pending(self):
+        """Whether the connection is pending, i.e. is to be established when
+        it is first needed.
+
+        :rtype: bool
+        """
+        return self._connect_kwargs is not None
+
     # DB-API 2.0 interface.
 
     def close(self):
         """Close the connection.
 
-        This method exists to conform to DB-API 2.0.
+        This method exists to conform to DB-API 2.0. If the database is
+        created with a pool, the connection is returned to the pool instead.
+        A pending connection is discarded without being established. Closing
+        an already closed database does nothing.
         """
-        self._conn.close()
+        if self._connect_kwargs is not None:
+            self._connect_kwargs = None
+            return
+        if self._conn is None:
+            return
+        if self._pool is None:
+            self._conn.close()
+        else:
+            self._pool.checkin(self._conn)
         self._conn = None
 
     def commit(self):
         """Commit any pending transaction to the database.
 
-        This method exists to conform to DB-API 2.0.
+        This method exists to conform to DB-API 2.0. Nothing is done if the
+        connection is pending.
         """
-        self._conn.commit()
+        if self._connect_kwargs is None:
+            self._conn.commit()
 
     def rollback(self):
         """Rollback pending transaction.
 
         This method exists to conform to DB-API 2.0. Behavior of calling this
         method on a database not supporting transactions is undefined.
+        Nothing is done if the connection is pending.
         """
-        self._conn.rollback()
+        if self._connect_kwargs is None:
+            self._conn.rollback()
 
     def cursor(self):
         """Return a new Cursor Object using the connection.
 
         This method exists to conform to DB-API 2.0.
         """
-        return self._conn.cursor()
+        return self.connection.cursor()
+
+    def server_side_cursor(self, batch_size=None):
+        """Return a new cursor that streams results from the server.
+
+        Rows of a query executed on a server-side cursor are transferred as
+        they are fetched, instead of all at once before the first row is
+        returned. The default implementation returns a normal cursor. Override
+        this for databases supporting server-side cursors.
+
+        :param batch_size: Hint on how many rows to transfer at a time.
+        """
+        return self.cursor()
+
+    @contextlib.contextmanager
+    def savepoint(self, name='sqlian_savepoint'):
+        """Context manager scoping statements in a SAVEPOINT.
+
+        If an exception is raised in the block, changes made in it are rolled
+        back to the savepoint, and the rest of the transaction is kept.
+        Otherwise the savepoint is released, leaving the changes in the
+        transaction to be committed (or rolled back) as usual.
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute('SAVEPOINT {}'.format(name))
+            try:
+                yield self
+            except Exception:
+                cursor.execute('ROLLBACK TO SAVEPOINT {}'.format(name))
+                raise
+            cursor.execute('RELEASE SAVEPOINT {}'.format(name))
+        finally:
+            cursor.close()
 
     # Things!
 
-    def execute_statement(self, statement_builder, args, kwargs):
+    def execute_statement(
+            self, statement_builder, args, kwargs, connection=None):
         """Build a statement, and execute it on the connection.
 
         This method provides implementation of statement construction and
@@ -149,21 +297,180 @@ class Database(object):
         You generally don't need to call this method directly as a user, but
         use one of the wrapper functions like the above instead.
 
+        `batch_size`, `stream`, and `server_side` keyword arguments, if
+        present, are not passed to the builder, but control how result rows
+        are fetched. `batch_size` and `stream` are passed to
+        :meth:`RecordCollection.from_cursor`. If `server_side` is ``True``
+        (the default for streaming results), the statement is executed on a
+        :meth:`server_side_cursor`.
+
+        :param connection: If given, a DB-API 2.0 connection to execute the
+            statement on (with a normal cursor), instead of this database's.
         :rtype: RecordCollection
         """
-        cursor = self._conn.cursor()
-        cursor.execute(statement_builder(*args, **kwargs))
-        return RecordCollection.from_cursor(cursor)
+        batch_size = kwargs.pop('batch_size', None)
+        stream = kwargs.pop('stream', False)
+        server_side = kwargs.pop('server_side', stream)
+        statement = statement_builder(*args, **kwargs)
+        if connection is not None:
+            cursor = connection.cursor()
+        elif server_side:
+            cursor = self.server_side_cursor(batch_size=batch_size)
+        else:
+            cursor = self.connection.cursor()
+        if isinstance(statement, tuple):    # Bound parameters.
+            cursor.execute(*statement)
+        else:
+            cursor.execute(statement)
+        return RecordCollection.from_cursor(
+            cursor, batch_size=batch_size, stream=stream,
+        )
+
+    def execute_query(self, statement_builder, args, kwargs):
+        """Build a statement that only reads data, and execute it.
+
+        This is used by :meth:`select`, :meth:`iterate`, and lazy queries.
+        The default implementation calls :meth:`execute_statement`. Override
+        this to execute queries elsewhere, e.g. on a read-only connection.
+
+        :rtype: RecordCollection
+        """
+        return self.execute_statement(statement_builder, args, kwargs)
 
     def select(self, *args, **kwargs):
         """Build and execute a SELECT statement.
+
+        If `lazy` is ``True``, the statement is not executed immediately.
+        A :class:`sqlian.records.Query` is returned instead, which executes
+        when first iterated, and pushes slicing, :func:`len`, and truth value
+        testing into SQL before that.
         """
-        return self.execute_statement(self.engine.select, args, kwargs)
+        if kwargs.pop('lazy', False):
+            return Query(self, args, kwargs)
+        return self.execute_query(self.engine.select, args, kwargs)
+
+    def iterate(self, *args, **kwargs):
+        """Build and execute a SELECT statement, streaming the result.
+
+        This works like :meth:`select`, but returns a streaming (forward-only)
+        :class:`RecordCollection` that does not keep records in memory after
+        they are yielded. The query is executed on a server-side cursor if
+        the database supports it.
+        """
+        kwargs['stream'] = True
+        return self.execute_query(self.engine.select, args, kwargs)
 
     def insert(self, *args, **kwargs):
         """Build and execute an INSERT statement.
+
+        Multiple rows passed as `values` are split into several statements
+        if they exceed the engine's limits. Pass `chunk_size` (maximum rows
+        per statement) and/or `max_bytes` (approximate maximum size of
+        values per statement) to override the engine's defaults; ``None``
+        means no limit. If the rows are split, the statements are executed
+        inside a :meth:`savepoint`, so rows inserted by earlier statements are
+        removed if a later one fails. The rest of the transaction is kept.
+        """
+        chunk_size = kwargs.pop(
+            'chunk_size', getattr(self.engine, 'insert_chunk_size', None),
+        )
+        max_bytes = kwargs.pop(
+            'max_bytes', getattr(self.engine, 'insert_max_bytes', None),
+        )
+        rows = kwargs.get('values')
+        if chunk_size is None and max_bytes is None:
+            rows = None
+        elif 'columns' not in kwargs and is_values_mapping_sequence(rows):
+            # Re-pack mappings so all chunks share the same column order.
+            columns = list(rows[0].keys())
+            rows = [[row[k] for k in columns] for row in rows]
+            kwargs['columns'] = columns
+        elif (not is_non_string_sequence(rows) or not rows or
+                is_single_row(rows)):
+            rows = None
+
+        if rows is None:
+            return self.execute_statement(self.engine.insert, args, kwargs)
+
+        # Bound parameters are limited per statement.
+        max_params = getattr(self.engine, 'insert_max_params', None)
+        if max_params is not None and getattr(self.engine, 'paramstyle', None):
+            row_limit = max(max_params // max(len(rows[0]), 1), 1)
+            if chunk_size is None or chunk_size > row_limit:
+                chunk_size = row_limit
+
+        chunks = list(self.iter_insert_chunks(rows, chunk_size, max_bytes))
+        if len(chunks) == 1:
+            kwargs['values'] = chunks[0]
+            return self.execute_statement(self.engine.insert, args, kwargs)
+
+        results = []
+        with self.savepoint():
+            for chunk in chunks:
+                kwargs['values'] = chunk
+                results.append(self.execute_statement(
+                    self.engine.insert, args, kwargs,
+                ))
+        return RecordCollection(itertools.chain.from_iterable(results))
+
+    def insert_many(self, *args, **kwargs):
+        """Build an INSERT statement once, and execute it for many rows.
+
+        This accepts the same arguments as :meth:`insert`, but `values` can
+        be any iterable of rows, which are consumed lazily. The statement is
+        built with placeholders in the DB-API module's paramstyle, and rows
+        are passed to the cursor's ``executemany()``. Rows can be sequences,
+        or mappings sharing the same keys (in which case the first row
+        decides the column order, unless `columns` is given).
+        """
+        rows = iter(kwargs.pop('values'))
+        try:
+            first_row = next(rows)
+        except StopIteration:   # Nothing to insert.
+            return RecordCollection(iter([]))
+        rows = itertools.chain([first_row], rows)
+
+        if isinstance(first_row, collections.Mapping):
+            if 'columns' not in kwargs:
+                kwargs['columns'] = list(first_row.keys())
+            columns = kwargs['columns']
+            rows = ([row[k] for k in columns] for row in rows)
+            column_count = len(columns)
+        else:
+            column_count = len(first_row)
+
+        # Render placeholders with a binding copy of the engine. Values in the
+        # template are dummy objects, which are always bound.
+        engine = copy.copy(self.engine)
+        engine.paramstyle = self.get_dbapi2().paramstyle
+        engine.render_cache = None
+        kwargs['values'] = NativeRow(object() for _ in range(column_count))
+        sql, _ = engine.insert(*args, **kwargs)
+
+        cursor = self.connection.cursor()
+        cursor.executemany(sql, (engine.pack_parameters(r) for r in rows))
+        return RecordCollection.from_cursor(cursor)
+
+    def iter_insert_chunks(self, rows, chunk_size, max_bytes):
+        """Split rows to insert into chunks within the given limits.
         """
-        return self.execute_statement(self.engine.insert, args, kwargs)
+        chunk = []
+        size = 0
+        for row in rows:
+            if max_bytes is not None:
+                row_size = estimate_row_size(row)
+                if chunk and size + row_size > max_bytes:
+                    yield chunk
+                    chunk = []
+                    size = 0
+                size += row_size
+            chunk.append(row)
+            if chunk_size is not None and len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+                size = 0
+        if chunk:
+            yield chunk
 
     def update(self, *args, **kwargs):
         """Build and execute an UPDATE statement.
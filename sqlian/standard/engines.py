@@ -1,11 +1,21 @@
 import collections
+import copy
+import datetime
 import functools
+import inspect
 import numbers
+import re
+import threading
+import uuid
 
 import six
 
-from sqlian import compat, NativeRow, Sql, UnescapableError
-from sqlian.utils import is_values_mapping_sequence, partition
+from sqlian import (
+    compat, NativeRow, Sql, UnescapableError, UnsupportedParameterError,
+)
+from sqlian.utils import (
+    is_non_string_sequence, is_values_mapping_sequence, partition,
+)
 
 from .clauses import Clause
 
@@ -63,7 +73,7 @@ class BaseEngine(object):
                 setattr(proxy, name, var)
             self.join = proxy
 
-    def build_sql(self, statement_klass, args, kwargs):
+    def build_statement(self, statement_klass, args, kwargs):
         """Build a statement from arguments.
 
         This method parses the arguments into appropriate clauses, and
@@ -90,10 +100,237 @@ class BaseEngine(object):
                 key = statement_klass.param_aliases[key]
             prepend_args.append(param_cls[key].parse(arg, self))
 
-        statement = statement_klass(*(prepend_args + clause_args))
+        return statement_klass(*(prepend_args + clause_args))
+
+    def build_sql(self, statement_klass, args, kwargs):
+        """Build a statement from arguments, and render it to SQL.
+        """
+        return self.render(self.build_statement(statement_klass, args, kwargs))
+
+    def render(self, statement):
+        """Render a statement to SQL.
+        """
         return statement.__sql__(self)
 
 
+class UnshapableError(TypeError):
+    """Raised when a SQL construct cannot describe its shape for caching.
+    """
+    def __init__(self, value):
+        super(UnshapableError, self).__init__(
+            '{} value {!r} does not describe its shape'.format(
+                type(value).__name__, value,
+            ),
+        )
+
+
+# Placeholder for a value in a statement shape.
+VALUE_SLOT = object()
+
+
+def implements_alongside_sql(klass, name):
+    """Check whether `klass` implements `name` in place of ``__sql__``.
+
+    An alternative rendering hook is only trustworthy if it is implemented
+    alongside (or below) ``__sql__`` in the inheritance chain. A subclass
+    overriding ``__sql__`` alone may render differently from the hook.
+    """
+    for base in inspect.getmro(klass):
+        if name in vars(base):
+            return True
+        if '__sql__' in vars(base):
+            return False
+    return False
+
+
+def overrides(klass, base, name):
+    """Check whether `klass` overrides attribute `name` of its base `base`.
+    """
+    for k in inspect.getmro(klass):
+        if k is base:
+            return False
+        if name in vars(k):
+            return True
+    return False
+
+
+def format_sql(engine, value):
+    return value.__sql__(engine)
+
+
+def format_unescapable(engine, value):
+    raise UnescapableError(value)
+
+
+def find_formatter(formatters, klass):
+    """Find the formatter to use for instances of `klass`.
+
+    SQL constructs always format themselves. Otherwise the most specific
+    class in the MRO with a registered formatter is used, falling back to
+    subclass checks to support abstract base classes like
+    :class:`numbers.Number`.
+    """
+    if hasattr(klass, '__sql__'):
+        return format_sql
+    for base in inspect.getmro(klass):
+        if base in formatters:
+            return formatters[base]
+    for base, formatter in formatters.items():
+        if issubclass(klass, base):
+            return formatter
+    return format_unescapable
+
+
+@compat.lru_cache(maxsize=None)
+def has_sql_shape(klass):
+    return implements_alongside_sql(klass, '__sql_shape__')
+
+
+@compat.lru_cache(maxsize=None)
+def has_sql_writer(klass):
+    return implements_alongside_sql(klass, '__sql_write__')
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', 'hits misses evictions maxsize currsize',
+)
+
+
+class RenderCache(object):
+    """A thread-safe, size-bounded LRU cache for rendered statements.
+
+    Keys are statement shapes (see :meth:`Engine.shape_of`), and values are
+    SQL fragments to interleave with values.
+    """
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise UnsupportedParameterError(maxsize, 'cache size')
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                fragments = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries[key] = fragments     # Mark as recently used.
+            self.hits += 1
+            return fragments
+
+    def put(self, key, fragments):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = fragments
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions,
+                self.maxsize, len(self._entries),
+            )
+
+
+class SlotMarker(object):
+    """Helper to mark slots in rendered SQL, and split them out afterwards.
+
+    Calling the instance records the argument as a slot, and returns a marker
+    unique to this instance. This is meant to be used internally, to override
+    formatter methods on an engine copy while rendering a statement.
+    """
+    def __init__(self):
+        self.token = uuid.uuid4().hex
+        self.slots = []
+
+    def __call__(self, slot):
+        self.slots.append(slot)
+        return Sql('\0{}:{}\0'.format(self.token, len(self.slots) - 1))
+
+    def split(self, sql):
+        """Split rendered SQL into fragments between slots.
+        """
+        return re.split('\0{}:\\d+\0'.format(self.token), sql)
+
+
+class SlotBuffer(list):
+    """Buffer of SQL fragments, with values cut out of it into slots.
+
+    This is passed to ``__sql_write__`` in place of a plain list to render a
+    statement with values cut out. The engine calls :meth:`cut` for values
+    that can be bound instead of writing them.
+    """
+    def __init__(self):
+        super(SlotBuffer, self).__init__()
+        self.fragments = []
+        self.values = []
+
+    def cut(self, value):
+        """End the current fragment, and record `value` in a slot after it.
+        """
+        self.fragments.append(''.join(self))
+        del self[:]
+        self.values.append(value)
+
+    def finish(self):
+        """End the last fragment.
+
+        :returns: A 2-tuple ``(fragments, values)``.
+        """
+        self.fragments.append(''.join(self))
+        del self[:]
+        return tuple(self.fragments), self.values
+
+
+class PreparedStatement(object):
+    """A statement rendered once, with parameter values filled in later.
+
+    Instances are returned by :meth:`Engine.prepare`. Calling the instance
+    with parameter values (either as a mapping, keyword arguments, or both)
+    splices escaped values into the pre-rendered SQL, and returns the result
+    as a :class:`sqlian.Sql` instance.
+    """
+    def __init__(self, engine, fragments, parameter_names):
+        self.engine = engine
+        self.fragments = fragments
+        self.parameter_names = parameter_names
+
+    def __repr__(self):
+        return '<PreparedStatement ({})>'.format(
+            ', '.join(self.parameter_names),
+        )
+
+    def __call__(self, *args, **kwargs):
+        values = dict(*args, **kwargs)
+        chunks = [self.fragments[0]]
+        for name, fragment in zip(self.parameter_names, self.fragments[1:]):
+            try:
+                value = values[name]
+            except KeyError:
+                raise TypeError('missing value for parameter {!r}'.format(
+                    name,
+                ))
+            if is_non_string_sequence(value):
+                value = self.engine.Value.parse(value, self.engine)
+            chunks.append(self.engine.render_value(value))
+            chunks.append(fragment)
+        return Sql(''.join(chunks))
+
+
 def iter_all_members(*modules):
     return (
         (name, getattr(module, name))
@@ -119,6 +356,86 @@ class Engine(BaseEngine):
     identifier_quote = '"'
     string_quote = "'"
 
+    # Limits for multi-row INSERT statements executed by a database. Rows are
+    # split into several statements if a statement would contain more than
+    # `insert_chunk_size` rows, more than (approximately) `insert_max_bytes`
+    # bytes of values, or more than `insert_max_params` bound parameters.
+    # None means no limit.
+    insert_chunk_size = None
+    insert_max_bytes = None
+    insert_max_params = None
+
+    # LIMIT value meaning "no limit", for databases requiring a LIMIT clause
+    # before OFFSET. None means OFFSET can be used alone.
+    unbounded_limit = None
+
+    # Whether NULL sorts before other values in ascending order (and after
+    # them in descending order). None means this is unknown.
+    nulls_first = None
+
+    # Placeholder formats of DB-API 2.0 paramstyles, and whether parameters
+    # are passed as a mapping.
+    paramstyles = {
+        'qmark': ('?', False),
+        'numeric': (':{number}', False),
+        'named': (':{name}', True),
+        'format': ('%s', False),
+        'pyformat': ('%({name})s', True),
+    }
+
+    def __init__(self, paramstyle=None, cache_size=None):
+        super(Engine, self).__init__()
+        if paramstyle is not None and paramstyle not in self.paramstyles:
+            raise UnsupportedParameterError(paramstyle, 'paramstyle')
+        self.paramstyle = paramstyle
+        if cache_size is None:
+            self.render_cache = None
+        else:
+            self.render_cache = RenderCache(cache_size)
+        self.value_formatters = collections.OrderedDict(
+            self.default_value_formatters,
+        )
+        self.identifier_formatters = collections.OrderedDict(
+            self.default_identifier_formatters,
+        )
+        self._value_dispatch = {}
+        self._identifier_dispatch = {}
+
+        # Rendering uses the dispatch methods to avoid creating Sql instances,
+        # unless a subclass overrides the "smart" methods.
+        self._overrides_as_value = overrides(type(self), Engine, 'as_value')
+        self._overrides_as_identifier = overrides(
+            type(self), Engine, 'as_identifier',
+        )
+
+    # Type-formatter pairs used by as_value() and as_identifier(). Formatters
+    # are called with the engine and the object to format. Use the register
+    # methods to add formatters to an engine instance.
+    default_value_formatters = [
+        (type(None), lambda engine, value: engine.format_null()),
+        (constants.Constant, lambda engine, value: (
+            engine.format_constant(value)
+        )),
+        (bool, lambda engine, value: engine.format_boolean(value)),
+        (numbers.Number, lambda engine, value: engine.format_number(value)),
+        (datetime.date, lambda engine, value: engine.format_datetime(value)),
+        (datetime.time, lambda engine, value: engine.format_datetime(value)),
+        (six.binary_type, lambda engine, value: (
+            engine.format_string(value.decode('utf-8'))
+        )),
+        (six.text_type, lambda engine, value: engine.format_string(value)),
+    ]
+    default_identifier_formatters = [
+        (type(None), lambda engine, name: engine.format_null()),
+        (constants.Constant, lambda engine, name: (
+            engine.format_constant(name)
+        )),
+        (six.binary_type, lambda engine, name: (
+            engine.format_identifier(name.decode('utf-8'))
+        )),
+        (six.text_type, lambda engine, name: engine.format_identifier(name)),
+    ]
+
     # Formatter methods: Override to format things of a certain type to SQL.
 
     def format_constant(self, value):
@@ -133,6 +450,11 @@ class Engine(BaseEngine):
     def format_number(self, value):
         return str(value)
 
+    def format_datetime(self, value):
+        if isinstance(value, datetime.datetime):
+            return self.format_string(value.isoformat(' '))
+        return self.format_string(value.isoformat())
+
     def escape_string(self, value):
         # SQL standard: replace quotes with pairs of them.
         return value.replace(self.string_quote, self.string_quote * 2)
@@ -150,37 +472,227 @@ class Engine(BaseEngine):
             self.escape_identifier(name),
         )
 
+    def format_parameter(self, name):
+        return '%({})s'.format(name)
+
     # "Smart" methods: Call these to format a given object to SQL.
 
     def as_value(self, value):
-        if hasattr(value, '__sql__'):
-            return value.__sql__(self)
-        if value is None:
-            return self.format_null()
-        if isinstance(value, self.Constant):
-            return self.format_constant(value)
-        if isinstance(value, bool):
-            return self.format_boolean(value)
-        if isinstance(value, numbers.Number):
-            return self.format_number(value)
-        if isinstance(value, six.binary_type):
-            return self.format_string(value.decode('utf-8'))
-        if isinstance(value, six.text_type):
-            return self.format_string(value)
-        raise UnescapableError(value)
+        return self.format_value(value)
 
     def as_identifier(self, name):
-        if hasattr(name, '__sql__'):
-            return name.__sql__(self)
-        if name is None:
-            return self.format_null()
-        if isinstance(name, self.Constant):
-            return self.format_constant(name)
-        if isinstance(name, six.binary_type):
-            return self.format_identifier(name.decode('utf-8'))
-        if isinstance(name, six.text_type):
-            return self.format_identifier(name)
-        raise UnescapableError(name)
+        return self.format_identifier_name(name)
+
+    # Dispatch methods: Like the "smart" methods, but return plain strings
+    # instead of Sql instances. These are used internally while rendering.
+
+    def format_value(self, value):
+        klass = type(value)
+        try:
+            formatter = self._value_dispatch[klass]
+        except KeyError:
+            formatter = find_formatter(self.value_formatters, klass)
+            self._value_dispatch[klass] = formatter
+        return formatter(self, value)
+
+    def format_identifier_name(self, name):
+        klass = type(name)
+        try:
+            formatter = self._identifier_dispatch[klass]
+        except KeyError:
+            formatter = find_formatter(self.identifier_formatters, klass)
+            self._identifier_dispatch[klass] = formatter
+        return formatter(self, name)
+
+    def render_value(self, value):
+        """Format `value` to SQL while rendering.
+
+        This calls :meth:`as_value` if a subclass overrides it, and
+        :meth:`format_value` otherwise.
+        """
+        if self._overrides_as_value:
+            return self.as_value(value)
+        return self.format_value(value)
+
+    def render_identifier(self, name):
+        """Format `name` to an SQL identifier while rendering.
+
+        This works like :meth:`render_value`, but for identifiers.
+        """
+        if self._overrides_as_identifier:
+            return self.as_identifier(name)
+        return self.format_identifier_name(name)
+
+    # Formatter registration.
+
+    def register_value_formatter(self, klass, formatter):
+        """Register a function to format values of a type.
+
+        `formatter` is called with the engine and the value to format, and
+        should return a SQL string. It is used for instances of `klass`, and
+        its subclasses, unless they have a more specific formatter. SQL
+        constructs (objects implementing ``__sql__``) are always formatted by
+        themselves.
+
+        This only affects this engine instance.
+        """
+        self.value_formatters[klass] = formatter
+        self._value_dispatch.clear()
+
+    def register_identifier_formatter(self, klass, formatter):
+        """Register a function to format identifiers of a type.
+
+        This works like :meth:`register_value_formatter`, but for
+        identifiers.
+        """
+        self.identifier_formatters[klass] = formatter
+        self._identifier_dispatch.clear()
+
+    # Buffer methods: Call these to write a given object into a buffer.
+
+    def write_value(self, value, out):
+        """Write `value` to the list `out` as SQL fragments.
+
+        This works like :meth:`as_value`, but SQL constructs supporting it
+        are written into `out` directly, and other values are written as
+        plain strings, without building intermediate :class:`Sql` instances.
+
+        If `out` is a :class:`SlotBuffer`, values that can be bound by the
+        driver are cut out into its slots instead. SQL constructs, NULL and
+        constants are always written inline, since they affect the statement
+        structure.
+        """
+        if has_sql_writer(type(value)):
+            value.__sql_write__(self, out)
+        elif (isinstance(out, SlotBuffer) and value is not None and
+                not hasattr(value, '__sql__') and
+                not isinstance(value, self.Constant)):
+            out.cut(value)
+        else:
+            out.append(self.render_value(value))
+
+    def write_identifier(self, name, out):
+        """Write `name` to the list `out` as an identifier.
+        """
+        out.append(self.render_identifier(name))
+
+    def write_values(self, values, out, separator=', '):
+        """Write each item in `values` to `out`, separated by `separator`.
+        """
+        for i, value in enumerate(values):
+            if i:
+                out.append(separator)
+            self.write_value(value, out)
+
+    def shape_of(self, value, values):
+        """Describe the structure of `value` for render caching.
+
+        Values that would be cut out into slots by :meth:`write_value` are
+        appended to `values` (in the order they appear in the rendered SQL),
+        and replaced by a placeholder in the result. The result is hashable,
+        and equal for two constructs only if they render to identical SQL
+        after values are filled in.
+
+        :raises UnshapableError: If `value` (or anything nested in it) is a
+            SQL construct that does not describe its shape.
+        """
+        if hasattr(value, '__sql__'):
+            if not has_sql_shape(type(value)):
+                raise UnshapableError(value)
+            return value.__sql_shape__(self, values)
+        if value is None or isinstance(value, self.Constant):
+            return value
+        values.append(value)
+        return VALUE_SLOT
+
+    # Rendering.
+
+    def render(self, statement):
+        """Render a statement to SQL.
+
+        If this engine has a render cache, statements of the same shape reuse
+        SQL rendered previously, and only have their values formatted. If
+        this engine has a `paramstyle`, values are not inlined into the
+        statement, but returned separately as a 2-tuple ``(sql, params)``,
+        suitable to be passed to a DB-API 2.0 cursor's ``execute()``.
+        """
+        if self.paramstyle is None and self.render_cache is None:
+            return statement.__sql__(self)
+
+        key = None
+        if self.render_cache is not None:
+            values = []
+            with compat.suppress(UnshapableError):
+                key = self.shape_of(statement, values)
+        fragments = None if key is None else self.render_cache.get(key)
+        if fragments is None:
+            fragments, values = self.render_fragments(statement)
+            if key is not None:
+                self.render_cache.put(key, fragments)
+
+        if self.paramstyle is None:
+            return self.fill_values(fragments, values)
+        return self.bind_parameters(fragments, values)
+
+    def render_fragments(self, statement):
+        """Render a statement, with values cut out.
+
+        The statement is written once into a :class:`SlotBuffer`. Values
+        inside SQL constructs that only implement ``__sql__`` (not
+        ``__sql_write__``) are inlined.
+
+        :returns: A 2-tuple ``(fragments, values)``. The statement is
+            reproduced by interleaving fragments with formatted values.
+        """
+        out = SlotBuffer()
+        self.write_value(statement, out)
+        return out.finish()
+
+    def fill_values(self, fragments, values):
+        """Join SQL fragments with inlined values.
+        """
+        chunks = [fragments[0]]
+        for value, fragment in zip(values, fragments[1:]):
+            chunks.append(self.render_value(value))
+            chunks.append(fragment)
+        return Sql(''.join(chunks))
+
+    def cache_info(self):
+        """Report render cache statistics.
+
+        :returns: A :class:`CacheInfo` instance, or ``None`` if this engine
+            does not have a render cache.
+        """
+        if self.render_cache is None:
+            return None
+        return self.render_cache.info()
+
+    def bind_parameters(self, fragments, values):
+        """Join SQL fragments with placeholders of this engine's paramstyle.
+
+        :returns: A 2-tuple ``(sql, params)``.
+        """
+        placeholder, _ = self.paramstyles[self.paramstyle]
+        if placeholder.startswith('%'):     # Literal percent signs.
+            fragments = [f.replace('%', '%%') for f in fragments]
+        chunks = [fragments[0]]
+        for i, fragment in enumerate(fragments[1:]):
+            chunks.append(placeholder.format(
+                number=i + 1, name='p{}'.format(i),
+            ))
+            chunks.append(fragment)
+        return Sql(''.join(chunks)), self.pack_parameters(values)
+
+    def pack_parameters(self, values):
+        """Pack values to bind in the form this engine's paramstyle expects.
+
+        Values are matched to placeholders created by
+        :meth:`bind_parameters` by position.
+        """
+        _, named = self.paramstyles[self.paramstyle]
+        if named:
+            return {'p{}'.format(i): value for i, value in enumerate(values)}
+        return tuple(values)
 
     # Shorthand methods.
 
@@ -222,6 +734,38 @@ class Engine(BaseEngine):
     def delete_from(self, *args, **kwargs):
         return self.delete(*args, **kwargs)
 
+    def prepare(self, statement_name, *args, **kwargs):
+        """Build a statement once, to be filled with values later.
+
+        `statement_name` names a statement builder method on this engine
+        (e.g. ``'select'``), and the rest of the arguments are passed to it.
+        Use :class:`Parameter <sqlian.standard.expressions.Parameter>`
+        instances as placeholders for values that change between calls:
+
+        .. code-block:: python
+
+            find_person = engine.prepare(
+                'select', star, from_='person',
+                where={'name': engine.Parameter('name')},
+            )
+            find_person(name='Mosky')
+
+        Everything except the parameter values is fixed when the statement is
+        prepared, including operator choices (a parameter compared with
+        ``=`` stays ``=`` even if it is later filled with ``None``).
+
+        :rtype: PreparedStatement
+        """
+        # Render the statement on a copy of this engine that emits unique
+        # markers for parameters, and split the result by them.
+        marker = SlotMarker()
+        engine = copy.copy(self)
+        engine.paramstyle = None
+        engine.render_cache = None
+        engine.format_parameter = marker
+        sql = getattr(engine, statement_name)(*args, **kwargs)
+        return PreparedStatement(self, marker.split(sql), marker.slots)
+
     def join(self, join_item, on=None, using=None, join_type=''):
         if on is not None and using is not None:
             raise TypeError(
@@ -1,7 +1,9 @@
 import collections
 import inspect
 
-from sqlian import compat, Parsable, Sql
+import six
+
+from sqlian import compat, Parsable, Writable
 from sqlian.utils import is_flat_two_tuple, is_non_string_sequence
 
 from .compositions import As, List
@@ -20,7 +22,7 @@ __all__ = [
 ]
 
 
-class Expression(Parsable):
+class Expression(Writable, Parsable):
     pass
 
 
@@ -37,8 +39,11 @@ class Value(Expression):
     def __repr__(self):
         return 'Value({!r})'.format(self.wrapped)
 
-    def __sql__(self, engine):
-        return engine.as_value(self.wrapped)
+    def __sql_write__(self, engine, out):
+        engine.write_value(self.wrapped, out)
+
+    def __sql_shape__(self, engine, values):
+        return engine.shape_of(self.wrapped, values)
 
     def __hash__(self):
         return hash(self.wrapped)
@@ -64,9 +69,18 @@ class Identifier(Expression):
             '.'.join(repr(p) for p in self.qualified_parts),
         )
 
-    def __sql__(self, engine):
-        return Sql('.').join(
-            Sql(engine.as_identifier(p))
+    def __sql_write__(self, engine, out):
+        for i, part in enumerate(self.qualified_parts):
+            if i:
+                out.append('.')
+            engine.write_identifier(part, out)
+
+    def __sql_shape__(self, engine, values):
+        # Identifiers are always inlined; only nested constructs can contain
+        # values to fill in.
+        return (type(self),) + tuple(
+            p if isinstance(p, (six.binary_type, six.text_type))
+            else engine.shape_of(p, values)
             for p in self.qualified_parts
         )
 
@@ -93,8 +107,11 @@ class Parameter(Expression):
     def __repr__(self):
         return 'Param({})'.format(self.name)
 
-    def __sql__(self, engine):
-        return Sql('%({})s'.format(self.name))
+    def __sql_write__(self, engine, out):
+        out.append(engine.format_parameter(self.name))
+
+    def __sql_shape__(self, engine, values):
+        return (type(self), self.name)
 
 
 class Condition(Expression):
@@ -113,18 +130,30 @@ class Condition(Expression):
 
 
 class Infix(Condition):
-    def __sql__(self, engine):
+
+    def get_operator(self, operand):
+        """Choose the operator to put before `operand`.
+        """
+        if (isinstance(operand, collections.Hashable) and
+                operand in self.alt_operators):
+            return self.alt_operators[operand]
+        return self.operator
+
+    def __sql_write__(self, engine, out):
+        it = iter(self.operands)
+        engine.write_value(next(it), out)
+        for op in it:
+            out.append(' ')
+            out.append(self.get_operator(op))
+            out.append(' ')
+            engine.write_value(op, out)
+
+    def __sql_shape__(self, engine, values):
         it = iter(self.operands)
-        parts = [engine.as_value(next(it))]
+        shape = (type(self), engine.shape_of(next(it), values))
         for op in it:
-            parts.append(Sql(
-                self.alt_operators[op]
-                if (isinstance(op, collections.Hashable) and
-                    op in self.alt_operators)
-                else self.operator
-            ))
-            parts.append(engine.as_value(op))
-        return Sql(' '.join(parts))
+            shape += (self.get_operator(op), engine.shape_of(op, values))
+        return shape
 
 
 class Equal(Infix):
@@ -1,5 +1,3 @@
-from sqlian import Sql
-
 from .expressions import Expression
 
 
@@ -17,10 +15,16 @@ class Function(Expression):
             type(self).__name__, ', '.join(repr(a) for a in self.args),
         )
 
-    def __sql__(self, engine):
-        return Sql('{}({})').format(Sql(self.sql_name), Sql(', ').join(
-            engine.as_value(v) for v in self.args
-        ))
+    def __sql_write__(self, engine, out):
+        out.append(self.sql_name)
+        out.append('(')
+        engine.write_values(self.args, out)
+        out.append(')')
+
+    def __sql_shape__(self, engine, values):
+        return (type(self),) + tuple(
+            engine.shape_of(v, values) for v in self.args
+        )
 
 
 class Count(Function):
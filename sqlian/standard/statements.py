@@ -1,4 +1,4 @@
-from sqlian import Sql
+from sqlian import Writable
 
 from . import clauses as c
 
@@ -26,7 +26,7 @@ class InvalidClauseError(StatementError):
     error_template = 'Statement {statement} does not accept clause {clause}'
 
 
-class Statement(object):
+class Statement(Writable):
 
     param_aliases = ()
 
@@ -44,9 +44,16 @@ class Statement(object):
             ),
         )
 
-    def __sql__(self, engine):
-        return Sql(' ').join(
-            engine.as_value(self.param_clauses[key])
+    def __sql_write__(self, engine, out):
+        engine.write_values((
+            self.param_clauses[key]
+            for key, _ in self.param_classes
+            if key in self.param_clauses
+        ), out, separator=' ')
+
+    def __sql_shape__(self, engine, values):
+        return (type(self),) + tuple(
+            (key, engine.shape_of(self.param_clauses[key], values))
             for key, _ in self.param_classes
             if key in self.param_clauses
         )
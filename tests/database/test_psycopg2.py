@@ -97,3 +97,28 @@ def test_connect_failure(database_name, scheme):
         connect('{scheme}:///{db}?invalid_option=1'.format(
             scheme=scheme, db=database_name,
         ))
+
+
+@pytest.mark.parametrize('format', ['text', 'csv'])
+def test_copy_in(db, format):
+    count = db.copy_in(
+        'person', ['name', 'occupation', 'main_language'],
+        [('Keith', 'iCHEF', None), {
+            'name': 'Tab\there', 'occupation': '',
+            'main_language': 'Py"thon',
+        }],
+        format=format,
+    )
+    assert count == 2
+    rows = db.select(star, from_='person')
+    assert [tuple(r.values()) for r in rows] == [
+        ('Mosky', 'Pinkoi', 'Python'),
+        ('Keith', 'iCHEF', None),
+        ('Tab\there', '', 'Py"thon'),
+    ]
+
+
+def test_copy_out(db):
+    assert b''.join(db.copy_out('person', header=True)) == (
+        b'name,occupation,main_language\nMosky,Pinkoi,Python\n'
+    )
@@ -0,0 +1,96 @@
+import sys
+import types
+
+import pytest
+
+from sqlian import star
+from sqlian.mysql import MySQLDBDatabase, PyMySQLDatabase
+from sqlian.postgresql import Psycopg2Database
+
+
+ROWS = [('Mosky', 'Pinkoi'), ('Keith', 'iCHEF')]
+DESCRIPTION = (('name',), ('occupation',))
+
+
+class Cursor(object):
+    """Stand-in cursor; server-side ones describe results after fetching.
+    """
+    def __init__(self, server_side):
+        self.server_side = server_side
+        self.description = None
+        self.itersize = None
+        self.executed = []
+        self._rows = []
+
+    def execute(self, statement, params=None):
+        self.executed.append(statement)
+        self._rows = list(ROWS)
+        if not self.server_side:
+            self.description = DESCRIPTION
+
+    def fetchone(self):
+        self.description = DESCRIPTION
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size):
+        self.description = DESCRIPTION
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+
+class SSCursor(object):
+    pass
+
+
+class Connection(object):
+    def __init__(self):
+        self.cursor_calls = []
+
+    def cursor(self, *args, **kwargs):
+        self.cursor_calls.append((args, kwargs))
+        return Cursor(server_side=bool(args or kwargs))
+
+
+@pytest.fixture
+def dbapi(monkeypatch):
+    module = types.ModuleType('sqlian_fake_dbapi')
+    module.paramstyle = 'format'
+    module.connect = lambda **kwargs: Connection()
+    cursors = types.ModuleType('sqlian_fake_dbapi.cursors')
+    cursors.SSCursor = SSCursor
+    module.cursors = cursors
+    monkeypatch.setitem(sys.modules, 'sqlian_fake_dbapi', module)
+    monkeypatch.setitem(sys.modules, 'sqlian_fake_dbapi.cursors', cursors)
+    return module
+
+
+@pytest.fixture(params=[Psycopg2Database, MySQLDBDatabase, PyMySQLDatabase])
+def db(request, dbapi):
+
+    class FakeDatabase(request.param):
+        dbapi2_module_name = dbapi.__name__
+
+    return FakeDatabase(database='db')
+
+
+def test_select_client_side(db):
+    rows = db.select(star, from_='person')
+    assert db.connection.cursor_calls == [((), {})]
+    assert [r.name for r in rows] == ['Mosky', 'Keith']
+
+
+def test_iterate_server_side(db):
+    rows = db.iterate(star, from_='person')
+    (args, kwargs), = db.connection.cursor_calls
+    if isinstance(db, Psycopg2Database):
+        assert args == ()
+        assert kwargs['name'].startswith('sqlian_')
+    else:
+        assert args == (SSCursor,)
+    assert [(r.name, r.occupation) for r in rows] == ROWS
+
+
+def test_select_server_side_batch_size(db):
+    rows = db.select(star, from_='person', server_side=True, batch_size=1)
+    assert len(db.connection.cursor_calls) == 1
+    assert [r[0] for r in rows] == ['Mosky', 'Keith']
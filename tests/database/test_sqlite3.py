@@ -1,9 +1,13 @@
 import contextlib
+import gc
+import threading
 
 import pytest
 
-from sqlian import connect, star
-from sqlian.sqlite import SQLite3Database
+from sqlian import ForwardOnlyError, PoolTimeout, connect, star
+from sqlian.sqlite import SQLite3ConcurrentDatabase, SQLite3Database
+from sqlian.standard import Count
+from sqlian.standard.clauses import Where
 
 
 @pytest.fixture
@@ -62,3 +66,472 @@ def test_connect(tmpdir, scheme):
 
     record, = db.select(star, from_='person')
     assert record.name == 'Mosky'
+
+
+def test_bind_params(tmpdir):
+    dbpath = tmpdir.join('sqlian-bind-test.sqlite3')
+    db = connect('sqlite:///{}'.format(dbpath), bind_params=True)
+    assert db.engine.paramstyle == 'qmark'
+
+    with contextlib.closing(db.cursor()) as cursor:
+        cursor.execute('''CREATE TABLE "person" ("name" TEXT)''')
+
+    db.insert('person', values={'name': "Mosky's"})
+    record, = db.select(star, from_='person', where={'name': "Mosky's"})
+    assert record.name == "Mosky's"
+
+
+def trace_statements(db, keyword):
+    statements = []
+
+    def trace(statement):
+        if statement.startswith(keyword):
+            statements.append(statement)
+
+    db.connection.set_trace_callback(trace)
+    return statements
+
+
+def trace_inserts(db):
+    return trace_statements(db, 'INSERT')
+
+
+def test_insert_chunked(db):
+    statements = trace_inserts(db)
+    db.insert('person', values=[
+        {'name': str(i), 'occupation': 'Pinkoi', 'main_language': 'Python'}
+        for i in range(1200)
+    ])
+    assert len(statements) == 3     # SQLite engine default is 500 rows.
+    assert len(db.select('name', from_='person')) == 1201
+
+
+def test_insert_chunk_size(db):
+    statements = trace_inserts(db)
+    db.insert(
+        'person', columns=('name', 'occupation', 'main_language'),
+        values=[(str(i), 'Pinkoi', 'Python') for i in range(5)],
+        chunk_size=2,
+    )
+    assert len(statements) == 3
+    names = [r.name for r in db.select('name', from_='person')]
+    assert names == ['Mosky', '0', '1', '2', '3', '4']
+
+
+def test_insert_max_bytes(db):
+    statements = trace_inserts(db)
+    db.insert(
+        'person', values=[('x' * 50, 'Pinkoi', 'Python')] * 4,
+        chunk_size=None, max_bytes=150,
+    )
+    assert len(statements) == 4
+
+
+def test_insert_chunked_rollback(db):
+    with contextlib.closing(db.cursor()) as cursor:
+        cursor.execute('''
+            CREATE UNIQUE INDEX "unique_name" ON "person" ("name")
+        ''')
+    db.insert('person', values=('Tim', 'Pinkoi', 'Python'))
+
+    # Earlier (uncommitted) writes are kept, only the failed insert's chunks
+    # are rolled back.
+    with pytest.raises(db.IntegrityError):
+        db.insert('person', values=[
+            ('Keith', 'iCHEF', 'Ruby'), ('Mosky', 'Pinkoi', 'Python'),
+        ], chunk_size=1)
+    with pytest.raises(db.IntegrityError):
+        db.insert('person', values=[
+            ('Keith', 'iCHEF', 'Ruby'), ('Mosky', 'Pinkoi', 'Python'),
+        ])
+    names = [r.name for r in db.select('name', from_='person')]
+    assert names == ['Mosky', 'Tim']
+
+    # The transaction is still open.
+    db.rollback()
+    assert len(db.select('name', from_='person')) == 0
+
+
+def test_insert_chunked_commit(db):
+    db.insert('person', values=[
+        ('Keith', 'iCHEF', 'Ruby'), ('Tim', 'Pinkoi', 'Python'),
+    ], chunk_size=1)
+    db.rollback()
+    assert len(db.select('name', from_='person')) == 0
+
+
+def test_insert_chunked_bound_params(tmpdir):
+    dbpath = tmpdir.join('sqlian-bind-test.sqlite3')
+    db = connect('sqlite:///{}'.format(dbpath), bind_params=True)
+    with contextlib.closing(db.cursor()) as cursor:
+        cursor.execute('''CREATE TABLE "t" ("a" INT, "b" INT, "c" INT)''')
+
+    statements = trace_inserts(db)
+    db.insert('t', values=[(i, i, i) for i in range(700)])
+    assert len(statements) == 3     # At most 999 // 3 = 333 rows each.
+    assert len(db.select(from_='t')) == 700
+
+
+def test_insert_many(db):
+    statements = trace_inserts(db)
+    db.insert_many('person', values=(
+        {'name': str(i), 'occupation': None, 'main_language': 'Python'}
+        for i in range(3)
+    ))
+    assert len(statements) == 3     # Executed once per row.
+    records = db.select(star, from_='person', where={'occupation': None})
+    assert [(r.name, r.main_language) for r in records] == [
+        ('0', 'Python'), ('1', 'Python'), ('2', 'Python'),
+    ]
+
+
+def test_insert_many_sequences(db):
+    db.insert_many(
+        'person', columns=('name', 'main_language'),
+        values=[('Keith', 'Ruby'), ('Tim', "Python's")],
+    )
+    records = db.select(star, from_='person', where={'occupation': None})
+    assert [(r.name, r.main_language) for r in records] == [
+        ('Keith', 'Ruby'), ('Tim', "Python's"),
+    ]
+
+
+def test_insert_many_empty(db):
+    assert not db.insert_many('person', values=[])
+
+
+def test_select_batch_size(db):
+    db.insert('person', values=[('Keith', 'iCHEF', 'Ruby')] * 4)
+    rows = db.select('name', from_='person', batch_size=2)
+    assert [r.name for r in rows] == ['Mosky'] + ['Keith'] * 4
+
+
+def test_iterate(db):
+    rows = db.iterate('name', from_='person')
+    assert [r.name for r in rows] == ['Mosky']
+    with pytest.raises(ForwardOnlyError):
+        list(rows)
+
+
+@pytest.fixture
+def lazy_db(db):
+    db.insert('person', values=[
+        ('Keith', 'iCHEF', 'Ruby'),
+        ('Tim', 'Apple', 'Swift'),
+        ('Guido', 'Dropbox', 'Python'),
+    ])
+    return db
+
+
+def test_select_lazy(lazy_db):
+    statements = trace_statements(lazy_db, 'SELECT')
+    query = lazy_db.select('name', from_='person', lazy=True)
+    assert repr(query) == '<Query (pending)>'
+    assert statements == []
+    assert [r.name for r in query] == ['Mosky', 'Keith', 'Tim', 'Guido']
+    assert [r.name for r in query] == ['Mosky', 'Keith', 'Tim', 'Guido']
+    assert statements == ['SELECT "name" FROM "person"']
+
+
+def test_select_lazy_slice(lazy_db):
+    statements = trace_statements(lazy_db, 'SELECT')
+    query = lazy_db.select('name', from_='person', order_by='name', lazy=True)
+    assert [r.name for r in query[1:3]] == ['Keith', 'Mosky']
+    assert [r.name for r in query[1:][1:5]] == ['Mosky', 'Tim']
+    assert query[3].name == 'Tim'
+    with pytest.raises(IndexError):
+        query[4]
+    assert statements == [
+        'SELECT "name" FROM "person" ORDER BY "name" LIMIT 2 OFFSET 1',
+        'SELECT "name" FROM "person" ORDER BY "name" LIMIT 4 OFFSET 2',
+        'SELECT "name" FROM "person" ORDER BY "name" LIMIT 1 OFFSET 3',
+        'SELECT "name" FROM "person" ORDER BY "name" LIMIT 1 OFFSET 4',
+    ]
+
+
+def test_select_lazy_slice_open_ended(lazy_db):
+    statements = trace_statements(lazy_db, 'SELECT')
+    query = lazy_db.select('name', from_='person', order_by='name', lazy=True)
+    assert [r.name for r in query[2:]] == ['Mosky', 'Tim']
+    assert statements == [
+        'SELECT "name" FROM "person" ORDER BY "name" LIMIT -1 OFFSET 2',
+    ]
+
+
+def test_select_lazy_len(lazy_db):
+    statements = trace_statements(lazy_db, 'SELECT')
+    query = lazy_db.select(
+        'name', from_='person', where={'main_language': 'Python'},
+        order_by='name', lazy=True,
+    )
+    assert len(query) == 2
+    assert len(query[1:]) == 1
+    assert len(query[:0]) == 0
+    assert statements == [
+        'SELECT COUNT(*) FROM "person" WHERE "main_language" = \'Python\'',
+    ] * 3
+
+
+def test_select_lazy_len_group_by(lazy_db):
+    query = lazy_db.select(
+        'main_language', from_='person', group_by='main_language',
+        lazy=True,
+    )
+    assert len(query) == 3
+
+
+def test_select_lazy_bool(lazy_db):
+    statements = trace_statements(lazy_db, 'SELECT')
+    assert lazy_db.select(from_='person', lazy=True)
+    assert not lazy_db.select(
+        from_='person', where={'name': 'Nobody'}, lazy=True,
+    )
+    assert not lazy_db.select(from_='person', lazy=True)[4:]
+    assert statements == [
+        'SELECT 1 FROM "person" LIMIT 1',
+        'SELECT 1 FROM "person" WHERE "name" = \'Nobody\' LIMIT 1',
+        'SELECT 1 FROM "person" LIMIT 1 OFFSET 4',
+    ]
+
+
+def test_select_lazy_bool_keeps_clauses(lazy_db):
+    where = Where.parse({'name': 'Nobody'}, lazy_db.engine)
+    query = lazy_db.select('name', where, from_='person', lazy=True)
+    assert not query
+    assert len(query) == 0
+    assert list(query) == []
+
+
+def test_select_lazy_one(lazy_db):
+    statements = trace_statements(lazy_db, 'SELECT')
+    query = lazy_db.select(
+        'name', from_='person', where={'main_language': 'Ruby'}, lazy=True,
+    )
+    assert query.first().name == 'Keith'
+    assert query.scalar() == 'Keith'
+    assert statements == [
+        'SELECT "name" FROM "person" WHERE "main_language" = \'Ruby\' '
+        'LIMIT 1',
+        'SELECT "name" FROM "person" WHERE "main_language" = \'Ruby\' '
+        'LIMIT 2',
+    ]
+
+
+def test_connect_pooled(tmpdir, monkeypatch):
+    monkeypatch.setattr('sqlian.databases.POOLS', {})
+    url = 'sqlite:///{}?pool_size=1&max_overflow=0&pool_timeout=0'.format(
+        tmpdir.join('sqlian-test.sqlite3'),
+    )
+    db = connect(url)
+    conn = db.connection
+    db.close()
+    db.close()      # Does not return the connection twice.
+    assert not db.is_open()
+
+    db = connect(url)
+    assert db.connection is conn
+    assert db.select(1).scalar() == 1
+    with pytest.raises(PoolTimeout):
+        connect(url)
+    db.close()
+
+
+def test_lazy_connect(tmpdir):
+    dbpath = tmpdir.join('sqlian-test.sqlite3')
+    db = SQLite3Database(database=str(dbpath), lazy_connect=True)
+    assert repr(db) == '<Database open=pending>'
+    assert db.is_pending()
+    assert not db.is_open()
+    assert not dbpath.check()
+    assert not hasattr(db, 'IntegrityError')
+
+    assert db.select(1).scalar() == 1
+    assert repr(db) == '<Database open=True>'
+    assert not db.is_pending()
+    assert dbpath.check()
+    assert issubclass(db.IntegrityError, Exception)
+    db.close()
+
+
+def test_lazy_connect_close(tmpdir):
+    dbpath = tmpdir.join('sqlian-test.sqlite3')
+    with SQLite3Database(database=str(dbpath), lazy_connect=True) as db:
+        pass
+    assert repr(db) == '<Database open=False>'
+    assert not dbpath.check()
+
+
+def test_connect_options(tmpdir):
+    dbpath = tmpdir.join('sqlian-options-test.sqlite3')
+    db = connect(
+        'sqlite:///{}?journal_mode=WAL&synchronous=NORMAL&cache_size=-65536'
+        '&mmap_size=268435456&busy_timeout=5000&cached_statements=512'
+        '&foreign_keys=true'.format(dbpath),
+    )
+
+    def pragma(name):
+        return db.connection.execute('PRAGMA {}'.format(name)).fetchone()[0]
+
+    assert pragma('journal_mode') == 'wal'
+    assert pragma('synchronous') == 1
+    assert pragma('cache_size') == -65536
+    assert pragma('mmap_size') in (0, 268435456)  # 0 if mmap is disabled.
+    assert pragma('busy_timeout') == 5000
+    assert pragma('foreign_keys') == 1
+    db.close()
+
+
+def test_connect_options_numeric_keywords(tmpdir):
+    dbpath = tmpdir.join('sqlian-options-test.sqlite3')
+    db = connect('sqlite:///{}?synchronous=0&temp_store=2'.format(dbpath))
+    assert db.connection.execute('PRAGMA synchronous').fetchone()[0] == 0
+    assert db.connection.execute('PRAGMA temp_store').fetchone()[0] == 2
+    db.close()
+
+
+def test_connect_options_invalid(tmpdir):
+    dbpath = tmpdir.join('sqlian-options-test.sqlite3')
+    with pytest.raises(ValueError):
+        connect('sqlite:///{}?journal_mode=WAL;DROP'.format(dbpath))
+    with pytest.raises(ValueError):
+        connect('sqlite:///{}?synchronous=1.5'.format(dbpath))
+    with pytest.raises(TypeError):
+        connect('sqlite:///{}?no_such_option=1'.format(dbpath))
+
+
+@pytest.fixture
+def concurrent_db(request, tmpdir):
+    db = SQLite3ConcurrentDatabase(
+        database=str(tmpdir.join('sqlian-concurrent-test.sqlite3')),
+    )
+    db.connection.execute('CREATE TABLE "person" ("name" TEXT)')
+    request.addfinalizer(db.close)
+    return db
+
+
+def test_concurrent_reads(concurrent_db):
+    concurrent_db.insert('person', values=('Mosky',))
+    assert concurrent_db.select(Count(star), from_='person').scalar() == 0
+    concurrent_db.commit()
+    assert concurrent_db.select(Count(star), from_='person').scalar() == 1
+
+    conns = {}
+    errors = []
+
+    def read(i):
+        try:
+            record = concurrent_db.select('name', from_='person').one()
+            assert record.name == 'Mosky'
+            conns[i] = concurrent_db.reader_connection()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(set(id(c) for c in conns.values())) == 4
+    assert concurrent_db.reader_connection() not in conns.values()
+    assert concurrent_db.reader_connection() is not concurrent_db.connection
+
+
+def test_concurrent_reader_closed_with_thread(concurrent_db):
+    conns = []
+
+    def read():
+        conns.append(concurrent_db.reader_connection())
+
+    for _ in range(3):
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+    gc.collect()
+    assert len(set(id(c) for c in conns)) == 3
+    assert not concurrent_db._reader_refs
+    for conn in conns:
+        with pytest.raises(concurrent_db.ProgrammingError):
+            conn.execute('SELECT 1')
+
+
+def test_concurrent_reader_read_only(concurrent_db):
+    journal_mode, = concurrent_db.connection.execute(
+        'PRAGMA journal_mode',
+    ).fetchone()
+    assert journal_mode == 'wal'
+    with pytest.raises(concurrent_db.OperationalError):
+        concurrent_db.reader_connection().execute(
+            'INSERT INTO "person" VALUES (\'Mosky\')',
+        )
+
+
+def test_concurrent_writes(concurrent_db):
+    def write():
+        concurrent_db.insert('person', values=('Mosky',))
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    concurrent_db.commit()
+    assert len(concurrent_db.select(star, from_='person')) == 4
+
+
+def test_concurrent_memory():
+    with pytest.raises(ValueError):
+        SQLite3ConcurrentDatabase(database=':memory:')
+
+
+def test_concurrent_snapshot(concurrent_db):
+    with pytest.raises(ValueError):
+        concurrent_db.snapshot_to_memory()
+
+
+def test_snapshot_to_memory(db):
+    db.insert('person', values=[('Keith', 'iCHEF', 'Ruby')] * 500)
+    db.commit()
+    steps = []
+    db.snapshot_to_memory(progress=lambda *args: steps.append(args))
+    assert len(steps) > 1
+    assert steps[-1][1] == 0    # No pages remaining.
+    assert len(db.select(star, from_='person')) == 501
+
+    db.delete('person')
+    assert not db.select(star, from_='person')
+    database_list = db.connection.execute('PRAGMA database_list').fetchall()
+    assert database_list[0][2] == ''    # In-memory.
+
+
+@pytest.mark.parametrize('write_back, count', [('0', 1), ('1', 0)])
+def test_connect_load_into_memory(tmpdir, write_back, count):
+    dbpath = tmpdir.join('sqlian-memory-test.sqlite3')
+    with SQLite3Database(database=str(dbpath)) as db:
+        db.connection.execute('CREATE TABLE "person" ("name" TEXT)')
+        db.insert('person', values=('Mosky',))
+
+    url = 'sqlite:///{}?load_into_memory=1&memory_write_back={}'.format(
+        dbpath, write_back,
+    )
+    memory_db = connect(url)
+    memory_db.delete('person')
+    memory_db.close()
+
+    db = connect(url)
+    assert len(db.select(star, from_='person')) == count
+    db.close()
+
+
+def test_connect_load_into_memory_options(tmpdir):
+    dbpath = tmpdir.join('sqlian-memory-test.sqlite3')
+    url = (
+        'sqlite:///{}?foreign_keys=1&isolation_level=IMMEDIATE&'
+        'journal_mode=WAL&load_into_memory=1'
+    ).format(dbpath)
+    db = connect(url)
+    conn = db.connection
+    assert conn.execute('PRAGMA database_list').fetchall()[0][2] == ''
+    assert conn.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+    assert conn.isolation_level == 'IMMEDIATE'
+    db.close()
@@ -1,3 +1,5 @@
+import six
+
 from sqlian import Sql, star
 
 
@@ -48,3 +50,15 @@ def test_replace(engine, c, e, m, s):
         'REPLACE INTO `person` (`person_id`, `name`) '
         "VALUES ('mosky', 'Mosky Liu')"
     )
+
+
+def test_escape_string(engine):
+    value = u''.join(six.unichr(i) for i in range(128))
+    value += u'\u00e9\u4e2d\\\'\\n'
+    expected = u''.join(engine.string_escape_map.get(c, c) for c in value)
+    assert engine.escape_string(value) == expected
+
+
+def test_escape_string_unchanged(engine):
+    value = u'{name: Mosky, occupation: Pinkoi}'
+    assert engine.escape_string(value) is value
@@ -0,0 +1,166 @@
+import datetime
+import io
+
+import pytest
+
+from sqlian import Sql
+
+from sqlian.postgresql import Psycopg2Database
+from sqlian.postgresql.streams import CopyInStream, iter_copy_lines
+
+
+class CopyCursor(object):
+
+    def __init__(self):
+        self.reads = []
+        self.rowcount = -1
+        self.closed = False
+        self.out_chunks = 3
+
+    def copy_expert(self, sql, file, size=8192):
+        self.sql = sql
+        if ' TO STDOUT' in sql:
+            for i in range(self.out_chunks):
+                file.write('{}\n'.format(i).encode('ascii'))
+            self.rowcount = self.out_chunks
+            return
+        while True:
+            data = file.read(size)
+            if not data:
+                break
+            self.reads.append(data)
+        self.rowcount = ''.join(self.reads).count('\n')
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # The connection is never established, so psycopg2 is not needed.
+    db = Psycopg2Database(database='db', lazy_connect=True)
+    cursor = CopyCursor()
+    monkeypatch.setattr(db, 'cursor', lambda: cursor)
+    return db
+
+
+def test_text_lines():
+    lines = iter_copy_lines([
+        ('Mosky', None, True, 1.5),
+        ('tab\there', 'line\nbreak', 'back\\slash', b'bytes'),
+        (datetime.datetime(2017, 1, 2, 3, 4), datetime.date(2017, 1, 2),
+         False, 42),
+    ])
+    assert list(lines) == [
+        'Mosky\t\\N\tt\t1.5\n',
+        'tab\\there\tline\\nbreak\tback\\\\slash\tbytes\n',
+        '2017-01-02 03:04:00\t2017-01-02\tf\t42\n',
+    ]
+
+
+def test_csv_lines():
+    lines = iter_copy_lines(
+        [{'name': 'Mo"sky', 'age': None}, {'name': '', 'age': 3}],
+        columns=['name', 'age'], format='csv',
+    )
+    assert list(lines) == ['"Mo""sky",\n', '"",3\n']
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        list(iter_copy_lines([(1,)], format='binary'))
+
+
+def test_stream_read_bounded():
+    pulled = []
+
+    def lines():
+        for i in range(100):
+            pulled.append(i)
+            yield 'line {:02}\n'.format(i)
+
+    stream = CopyInStream(lines())
+    assert stream.read(12) == 'line 00\nline'
+    assert pulled == [0, 1]
+    assert stream.read(8) == ' 01\nline'
+    assert pulled == [0, 1, 2]
+    assert len(stream.read()) == 98 * 8 - 4
+    assert stream.read(10) == ''
+
+
+def test_copy_in(db):
+    count = db.copy_in('person', ['name', 'age'], [('Mosky', 3), ('Keith', 4)])
+    cursor = db.cursor()
+    assert count == 2
+    assert cursor.sql == 'COPY "person" ("name", "age") FROM STDIN'
+    assert ''.join(cursor.reads) == 'Mosky\t3\nKeith\t4\n'
+    assert cursor.closed
+
+
+def test_copy_in_mappings_csv(db):
+    db.copy_in('public.person', rows=[{'name': 'Mosky'}], format='csv')
+    cursor = db.cursor()
+    assert cursor.sql == (
+        'COPY "public"."person" ("name") FROM STDIN WITH (FORMAT csv)'
+    )
+    assert cursor.reads == ['"Mosky"\n']
+
+
+def test_copy_in_chunks(db):
+    db.copy_in('person', ['n'], ([i] for i in range(1000)), buffer_size=100)
+    cursor = db.cursor()
+    assert max(len(r) for r in cursor.reads) == 100
+    assert len(cursor.reads) == len(''.join(cursor.reads)) // 100 + 1
+
+
+def test_copy_in_empty(db):
+    assert db.copy_in('person', ['name'], []) == 0
+    assert not hasattr(db.cursor(), 'sql')
+
+
+def test_copy_out_table(db):
+    fileobj = io.BytesIO()
+    assert db.copy_out('person', fileobj) == 3
+    assert db.cursor().sql == 'COPY "person" TO STDOUT WITH (FORMAT csv)'
+    assert fileobj.getvalue() == b'0\n1\n2\n'
+
+
+def test_copy_out_statement(db):
+    engine = db.engine
+    statement = engine.build_statement(
+        engine.statements.Select, ('name',),
+        {'from_': 'person', 'where': {'age': 3}},
+    )
+    db.copy_out(statement, io.BytesIO(), format='text')
+    assert db.cursor().sql == (
+        'COPY (SELECT "name" FROM "person" WHERE "age" = 3) TO STDOUT'
+    )
+    db.copy_out(Sql('SELECT 1'), io.BytesIO(), header=True)
+    assert db.cursor().sql == (
+        'COPY (SELECT 1) TO STDOUT WITH (FORMAT csv, HEADER)'
+    )
+
+
+def test_copy_out_generator(db):
+    chunks = db.copy_out('person')
+    assert not hasattr(db.cursor(), 'sql')     # Not started until iterated.
+    assert list(chunks) == [b'0\n', b'1\n', b'2\n']
+    assert db.cursor().closed
+
+
+def test_copy_out_generator_closed_early(db):
+    cursor = db.cursor()
+    cursor.out_chunks = 1000
+    chunks = db.copy_out('person')
+    assert next(chunks) == b'0\n'
+    chunks.close()
+    assert cursor.closed    # The COPY is stopped.
+
+
+def test_copy_out_generator_error(db, monkeypatch):
+    def fail(sql, file, size):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(db.cursor(), 'copy_expert', fail)
+    with pytest.raises(RuntimeError):
+        list(db.copy_out('person'))
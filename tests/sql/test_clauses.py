@@ -66,3 +66,20 @@ def test_values_list(engine):
     assert sql.__sql__(engine) == Sql('''
         VALUES ('Mosky', 42, "person"."name")
     '''.strip())
+
+
+def test_where_nested_sql_override(engine):
+
+    class FirstPart(e.Identifier):
+        def __sql__(self, engine):
+            return Sql(engine.format_identifier(self.qualified_parts[0]))
+
+    sql = c.Where(e.Equal(FirstPart('NAME'), 'Mosky'))
+    assert sql.__sql__(engine) == Sql('''WHERE "NAME" = 'Mosky\'''')
+
+
+def test_write_value(engine):
+    out = []
+    engine.write_value(c.Limit(10), out)
+    assert out == ['LIMIT', ' ', '10']
+    assert not any(isinstance(fragment, Sql) for fragment in out)
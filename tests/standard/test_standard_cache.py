@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from sqlian import Sql, UnsupportedParameterError, star
+from sqlian.standard import Engine
+
+
+@pytest.fixture
+def cached_engine():
+    return Engine(cache_size=2)
+
+
+def test_cache_hit(cached_engine):
+    sql = cached_engine.select(star, from_='person', where={'name': 'Mosky'})
+    assert sql == Sql('''SELECT * FROM "person" WHERE "name" = 'Mosky\'''')
+    sql = cached_engine.select(star, from_='person', where={'name': 'Keith'})
+    assert sql == Sql('''SELECT * FROM "person" WHERE "name" = 'Keith\'''')
+    assert cached_engine.cache_info() == (1, 1, 0, 2, 1)
+
+
+def test_cache_value_types(cached_engine):
+    cached_engine.update('person', set={'age': 20}, where={'name': 'Mosky'})
+    sql = cached_engine.update(
+        'person', set={'age': True}, where={'name': "O'Brien"},
+    )
+    assert sql == Sql(
+        '''UPDATE "person" SET "age" = TRUE WHERE "name" = 'O''Brien\''''
+    )
+    assert cached_engine.cache_info().hits == 1
+
+
+def test_cache_null_is_structural(cached_engine):
+    sql = cached_engine.delete('person', where={'name': 'Mosky'})
+    assert sql == Sql('''DELETE FROM "person" WHERE "name" = 'Mosky\'''')
+    sql = cached_engine.delete('person', where={'name': None})
+    assert sql == Sql('DELETE FROM "person" WHERE "name" IS NULL')
+    assert cached_engine.cache_info().hits == 0
+
+
+def test_cache_identifiers_are_structural(cached_engine):
+    cached_engine.select('name', from_='person')
+    sql = cached_engine.select('occupation', from_='person')
+    assert sql == Sql('SELECT "occupation" FROM "person"')
+    assert cached_engine.cache_info().hits == 0
+
+
+def test_cache_list_arity(cached_engine):
+    cached_engine.insert('person', values=[('a', 1), ('b', 2)])
+    sql = cached_engine.insert('person', values=[('a', 1)])
+    assert sql == Sql('''INSERT INTO "person" VALUES ('a', 1)''')
+    assert cached_engine.cache_info().hits == 0
+
+
+def test_cache_eviction(cached_engine):
+    cached_engine.select('a', from_='person')
+    cached_engine.select('b', from_='person')
+    cached_engine.select('a', from_='person')   # Refreshes 'a'.
+    cached_engine.select('c', from_='person')   # Evicts 'b'.
+    cached_engine.select('a', from_='person')
+    assert cached_engine.cache_info() == (2, 3, 1, 2, 2)
+
+
+def test_cache_unshapable_clause(cached_engine):
+
+    class Raw(cached_engine.clauses.Where):
+        def __sql__(self, engine):
+            return Sql('WHERE {}'.format(self.children[0]))
+
+    for text in ('1 = 1', '1 = 0'):
+        sql = cached_engine.select(star, Raw(text), from_='person')
+        assert sql == Sql('SELECT * FROM "person" WHERE {}'.format(text))
+    assert cached_engine.cache_info() == (0, 0, 0, 2, 0)
+
+
+def test_cache_with_paramstyle():
+    engine = Engine(paramstyle='qmark', cache_size=8)
+    engine.select(star, from_='person', where={'name': 'Mosky'})
+    sql, params = engine.select(star, from_='person', where={'name': 'Keith'})
+    assert sql == Sql('SELECT * FROM "person" WHERE "name" = ?')
+    assert params == ('Keith',)
+    assert engine.cache_info().hits == 1
+
+
+def test_cache_threads(cached_engine):
+    results = {}
+
+    def render(i):
+        results[i] = cached_engine.select(
+            star, from_='person', where={'age': i},
+        )
+
+    threads = [threading.Thread(target=render, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {
+        i: Sql('SELECT * FROM "person" WHERE "age" = {}'.format(i))
+        for i in range(20)
+    }
+    assert sum(cached_engine.cache_info()[:2]) == 20
+
+
+def test_cache_disabled(engine):
+    assert engine.cache_info() is None
+
+
+def test_cache_invalid_size():
+    with pytest.raises(UnsupportedParameterError) as ctx:
+        Engine(cache_size=0)
+    assert str(ctx.value) == 'unsupported cache size 0'
@@ -0,0 +1,108 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+from sqlian import Sql, UnescapableError, star
+from sqlian.standard import Engine
+
+
+def test_decimal(engine):
+    assert engine.as_value(decimal.Decimal('1.50')) == Sql('1.50')
+
+
+def test_datetime(engine):
+    value = datetime.datetime(2017, 5, 4, 12, 30, 15)
+    assert engine.as_value(value) == Sql("'2017-05-04 12:30:15'")
+
+
+def test_date(engine):
+    value = datetime.date(2017, 5, 4)
+    assert engine.as_value(value) == Sql("'2017-05-04'")
+
+
+def test_time(engine):
+    value = datetime.time(12, 30)
+    assert engine.as_value(value) == Sql("'12:30:00'")
+
+
+def test_subclass(engine):
+
+    class Level(int):
+        pass
+
+    assert engine.as_value(Level(3)) == Sql('3')
+    assert engine.as_value(True) == Sql('TRUE')
+
+
+def test_unescapable(engine):
+
+    class Opaque(object):
+        def __repr__(self):
+            return 'Opaque()'
+
+    with pytest.raises(UnescapableError) as ctx:
+        engine.as_value(Opaque())
+    assert str(ctx.value) == 'Opaque value Opaque() cannot be escaped'
+
+
+def test_register_value_formatter(engine):
+    value = uuid.UUID('12345678123456781234567812345678')
+    with pytest.raises(UnescapableError):
+        engine.as_value(value)
+    engine.register_value_formatter(
+        uuid.UUID, lambda engine, value: engine.format_string(value.hex),
+    )
+    assert engine.as_value(value) == Sql("'12345678123456781234567812345678'")
+
+    # Registration only affects this engine.
+    with pytest.raises(UnescapableError):
+        Engine().as_value(value)
+
+
+def test_register_value_formatter_override(engine):
+    engine.register_value_formatter(bool, lambda engine, value: str(+value))
+    sql = engine.select(star, from_='t', where={'a': True})
+    assert sql == Sql('SELECT * FROM "t" WHERE "a" = 1')
+
+
+def test_register_identifier_formatter(engine):
+
+    class Column(object):
+        def __init__(self, table, name):
+            self.table = table
+            self.name = name
+
+    engine.register_identifier_formatter(Column, lambda engine, column: (
+        '{}.{}'.format(
+            engine.format_identifier(column.table),
+            engine.format_identifier(column.name),
+        )
+    ))
+    sql = engine.select(from_='person', order_by=engine.Identifier(
+        Column('person', 'name'),
+    ))
+    assert sql == Sql('SELECT * FROM "person" ORDER BY "person"."name"')
+
+
+def test_override_as_value():
+
+    class UUIDEngine(Engine):
+        def as_value(self, value):
+            if isinstance(value, uuid.UUID):
+                return self.format_string(value.hex)
+            return super(UUIDEngine, self).as_value(value)
+
+        def as_identifier(self, name):
+            return super(UUIDEngine, self).as_identifier(name.lower())
+
+    value = uuid.UUID('12345678123456781234567812345678')
+    sql = UUIDEngine().select('Name', from_='Person', where={'Key': value})
+    assert sql == Sql(
+        'SELECT "name" FROM "person" '
+        'WHERE "key" = \'12345678123456781234567812345678\'',
+    )
+    assert UUIDEngine(cache_size=4).select(
+        'Name', from_='Person', where={'Key': value},
+    ) == sql
@@ -0,0 +1,87 @@
+import pytest
+
+from sqlian import Sql, UnsupportedParameterError, star
+from sqlian.standard import Engine
+
+
+def test_qmark():
+    engine = Engine(paramstyle='qmark')
+    sql, params = engine.select(
+        star, from_='person', where={'name': 'Mosky', 'age >': 20},
+        limit=1,
+    )
+    assert sql in (
+        Sql('SELECT * FROM "person" WHERE "name" = ? AND "age" > ? LIMIT ?'),
+        Sql('SELECT * FROM "person" WHERE "age" > ? AND "name" = ? LIMIT ?'),
+    )
+    assert sorted(params[:2], key=str) == [20, 'Mosky']
+    assert params[2] == 1
+
+
+def test_numeric():
+    engine = Engine(paramstyle='numeric')
+    sql, params = engine.insert(
+        'person', columns=('person_id', 'name'), values=('mosky', 'Mosky'),
+    )
+    assert sql == Sql(
+        'INSERT INTO "person" ("person_id", "name") VALUES (:1, :2)'
+    )
+    assert params == ('mosky', 'Mosky')
+
+
+def test_named():
+    engine = Engine(paramstyle='named')
+    sql, params = engine.update(
+        'person', set={'name': 'Mosky'}, where={'person_id': 'mosky'},
+    )
+    assert sql == Sql(
+        'UPDATE "person" SET "name" = :p0 WHERE "person_id" = :p1'
+    )
+    assert params == {'p0': 'Mosky', 'p1': 'mosky'}
+
+
+def test_format_escapes_percent():
+    engine = Engine(paramstyle='format')
+    sql, params = engine.delete(
+        'person', where={'name like': 'M%', 'occupation': None},
+    )
+    assert sql in (
+        Sql('DELETE FROM "person" WHERE "name" LIKE %s AND '
+            '"occupation" IS NULL'),
+        Sql('DELETE FROM "person" WHERE "occupation" IS NULL AND '
+            '"name" LIKE %s'),
+    )
+    assert params == ('M%',)
+
+
+def test_pyformat():
+    engine = Engine(paramstyle='pyformat')
+    sql, params = engine.select(
+        '100%', from_='person', where={'person_id in': ['a', 'b']},
+    )
+    assert sql == Sql(
+        'SELECT "100%%" FROM "person" '
+        'WHERE "person_id" IN (%(p0)s, %(p1)s)'
+    )
+    assert params == {'p0': 'a', 'p1': 'b'}
+
+
+def test_unknown_paramstyle():
+    with pytest.raises(UnsupportedParameterError) as ctx:
+        Engine(paramstyle='dollar')
+    assert str(ctx.value) == "unsupported paramstyle 'dollar'"
+
+
+def test_render_fragments():
+    engine = Engine(paramstyle='qmark')
+    statement = engine.build_statement(engine.statements.Select, (), {
+        'select': star, 'from_': 'person',
+        'where': {'name': 'Mos\0ky', 'occupation': None},
+    })
+    fragments, values = engine.render_fragments(statement)
+    assert ''.join(fragments) in (
+        'SELECT * FROM "person" WHERE "name" =  AND "occupation" IS NULL',
+        'SELECT * FROM "person" WHERE "occupation" IS NULL AND "name" = ',
+    )
+    assert len(fragments) == 2
+    assert values == ['Mos\0ky']
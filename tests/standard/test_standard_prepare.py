@@ -0,0 +1,79 @@
+import pytest
+
+from sqlian import Sql, star
+
+
+def test_prepare_select(engine):
+    prepared = engine.prepare(
+        'select', star, from_='person',
+        where={'name': engine.Parameter('name')},
+    )
+    assert prepared(name='Mosky') == Sql(
+        '''SELECT * FROM "person" WHERE "name" = 'Mosky\''''
+    )
+    assert prepared({'name': "O'Brien"}) == Sql(
+        '''SELECT * FROM "person" WHERE "name" = 'O''Brien\''''
+    )
+
+
+def test_prepare_insert(engine):
+    prepared = engine.prepare(
+        'insert', 'person',
+        columns=('person_id', 'name'),
+        values=(engine.Parameter('id'), engine.Parameter('name')),
+    )
+    assert prepared(id=42, name='Mosky') == Sql(
+        '''INSERT INTO "person" ("person_id", "name") '''
+        '''VALUES (42, 'Mosky')'''
+    )
+
+
+def test_prepare_repeated_parameter(engine):
+    prepared = engine.prepare(
+        'update', 'person',
+        set={'name': engine.Parameter('name')},
+        where={'nickname': engine.Parameter('name')},
+    )
+    assert prepared(name='Mosky') == Sql(
+        '''UPDATE "person" SET "name" = 'Mosky' '''
+        '''WHERE "nickname" = 'Mosky\''''
+    )
+
+
+def test_prepare_sequence_value(engine):
+    prepared = engine.prepare(
+        'delete', 'person', where={'person_id in': engine.Parameter('ids')},
+    )
+    assert prepared(ids=[1, 2, 3]) == Sql(
+        'DELETE FROM "person" WHERE "person_id" IN (1, 2, 3)'
+    )
+
+
+def test_prepare_literal_percent(engine):
+    prepared = engine.prepare(
+        'select', star, from_='person',
+        where={'name like': '%(name)s', 'occupation': engine.Parameter('o')},
+    )
+    assert prepared(o='Pinkoi') in (
+        Sql('''SELECT * FROM "person" WHERE "name" LIKE '%(name)s' '''
+            '''AND "occupation" = 'Pinkoi\''''),
+        Sql('''SELECT * FROM "person" WHERE "occupation" = 'Pinkoi' '''
+            '''AND "name" LIKE '%(name)s\''''),
+    )
+
+
+def test_prepare_missing_value(engine):
+    prepared = engine.prepare(
+        'select', star, from_='person',
+        where={'name': engine.Parameter('name')},
+    )
+    with pytest.raises(TypeError) as ctx:
+        prepared(nickname='Mosky')
+    assert str(ctx.value) == "missing value for parameter 'name'"
+
+
+def test_parameter_unprepared(engine):
+    sql = engine.select(
+        star, from_='person', where={'name': engine.Parameter('name')},
+    )
+    assert sql == Sql('SELECT * FROM "person" WHERE "name" = %(name)s')
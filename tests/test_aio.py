@@ -0,0 +1,178 @@
+import asyncio
+import threading
+
+import pytest
+
+from sqlian import star
+from sqlian.standard import Count
+from sqlian.aio import AsyncDatabase, AsyncPool, connect, create_pool
+from sqlian.sqlite import SQLite3Database
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def url(tmpdir):
+    return 'sqlite:///{}'.format(tmpdir.join('sqlian-test.sqlite3'))
+
+
+async def create_table(db):
+    def create():
+        db.database.cursor().execute('''
+            CREATE TABLE "person" ("name" TEXT, "occupation" TEXT)
+        ''')
+    await db.run(create)
+
+
+def test_select(url):
+    async def main():
+        async with await connect(url) as db:
+            await create_table(db)
+            await db.insert('person', values=[
+                ('Mosky', 'Pinkoi'), ('Keith', 'iCHEF'), ('Tim', 'Apple'),
+            ])
+            rows = await db.select('name', from_='person', batch_size=2)
+            names = [r.name async for r in rows]
+            count = await (await db.select(
+                Count(star), from_='person',
+            )).scalar()
+        return names, count
+
+    names, count = run(main())
+    assert names == ['Mosky', 'Keith', 'Tim']
+    assert count == 3
+
+
+def test_runs_on_dedicated_thread(url):
+    async def main():
+        db = await connect(url)
+        threads = [
+            await db.run(threading.current_thread),
+            await db.run(threading.current_thread),
+        ]
+        await db.close()
+        return threads
+
+    thread_1, thread_2 = run(main())
+    assert thread_1 is thread_2
+    assert thread_1 is not threading.current_thread()
+
+
+def test_prefetch(url):
+    async def main():
+        db = await connect(url)
+        await create_table(db)
+        await db.insert('person', values=[('Mosky', 'Pinkoi')] * 5)
+        rows = await db.select(star, from_='person', batch_size=2)
+        first = await rows.__anext__()
+        prefetched = rows._next_batch
+        rest = await rows.all()
+        await db.close()
+        return first, prefetched, rest
+
+    first, prefetched, rest = run(main())
+    assert first.name == 'Mosky'
+    assert prefetched is not None
+    assert len(rest) == 4
+
+
+def test_transaction(url):
+    async def main():
+        db = await connect(url)
+        await create_table(db)
+        async with db.transaction():
+            await db.insert('person', values=('Mosky', 'Pinkoi'))
+        with pytest.raises(ZeroDivisionError):
+            async with db.transaction():
+                await db.insert('person', values=('Keith', 'iCHEF'))
+                1 / 0
+        rows = await (await db.select('name', from_='person')).all()
+        await db.close()
+        return rows
+
+    assert [r.name for r in run(main())] == ['Mosky']
+
+
+def test_repr(url):
+    async def main():
+        db = await connect(url)
+        text = repr(db)
+        await db.close()
+        return text
+
+    assert run(main()) == '<AsyncDatabase Database open=True>'
+
+
+def test_wrap_lazy_database(tmpdir):
+    # The connection is established on the worker thread on first use.
+    database = SQLite3Database(
+        database=str(tmpdir.join('sqlian-test.sqlite3')), lazy_connect=True,
+    )
+
+    async def main():
+        async with AsyncDatabase(database) as db:
+            return await (await db.select(1)).scalar()
+
+    assert run(main()) == 1
+    assert not database.is_open()
+
+
+def test_pool(url, monkeypatch):
+    monkeypatch.setattr('sqlian.databases.POOLS', {})
+    pool = create_pool(url + '?check_same_thread=false', max_size=2)
+
+    async def main():
+        async with pool.acquire() as db:
+            await create_table(db)
+        await asyncio.gather(*(
+            pool.insert('person', values=(name, 'Pinkoi'))
+            for name in ['Mosky', 'Keith', 'Tim']
+        ))
+
+        # Concurrent blocks run on different connections.
+        async with pool.acquire() as db_1:
+            async with pool.acquire() as db_2:
+                conns = [db_1.database.connection, db_2.database.connection]
+
+        with pytest.raises(ZeroDivisionError):
+            async with pool.acquire() as db:
+                await db.insert('person', values=('Rolled', 'Back'))
+                1 / 0
+        return conns, await pool.select('name', from_='person')
+
+    (conn_1, conn_2), rows = run(main())
+    assert conn_1 is not conn_2
+    assert sorted(r.name for r in rows) == ['Keith', 'Mosky', 'Tim']
+
+
+def test_pool_max_size(url):
+    active = []
+    peak = []
+
+    def factory():
+        active.append(None)
+        peak.append(len(active))
+        database = SQLite3Database(database=url[len('sqlite:///'):])
+        close = database.close
+
+        def close_and_count():
+            active.pop()
+            close()
+
+        database.close = close_and_count
+        return database
+
+    pool = AsyncPool(factory, max_size=2)
+
+    async def main():
+        await asyncio.gather(*(pool.select(1) for _ in range(6)))
+
+    run(main())
+    assert max(peak) <= 2
+    assert not active
@@ -0,0 +1,124 @@
+import threading
+
+import pytest
+
+from sqlian.pools import Pool, PoolTimeout
+
+
+class Connection(object):
+
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.broken = False
+
+    def cursor(self):
+        if self.broken:
+            raise RuntimeError('connection is broken')
+        return Cursor()
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class Cursor(object):
+
+    def execute(self, statement):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_reuse():
+    pool = Pool(size=1)
+    conn = pool.checkout(Connection)
+    pool.checkin(conn)
+    assert conn.rollbacks == 1
+    assert not conn.closed
+    assert pool.checkout(Connection) is conn
+
+
+def test_checkin_twice():
+    pool = Pool(size=1, max_overflow=0)
+    conn = pool.checkout(Connection)
+    pool.checkin(conn)
+    with pytest.raises(ValueError):
+        pool.checkin(conn)
+    with pytest.raises(ValueError):
+        pool.checkin(Connection())
+    assert repr(pool) == '<Pool size=1 idle=1 open=1>'
+
+
+def test_overflow():
+    pool = Pool(size=1, max_overflow=1)
+    conn_1 = pool.checkout(Connection)
+    conn_2 = pool.checkout(Connection)
+    assert conn_1 is not conn_2
+    pool.checkin(conn_1)
+    pool.checkin(conn_2)
+    assert not conn_1.closed
+    assert conn_2.closed    # Overflow connections are not kept.
+    assert repr(pool) == '<Pool size=1 idle=1 open=1>'
+
+
+def test_timeout():
+    pool = Pool(size=1, max_overflow=0, timeout=0.01)
+    pool.checkout(Connection)
+    with pytest.raises(PoolTimeout):
+        pool.checkout(Connection)
+
+
+def test_blocking_checkout():
+    pool = Pool(size=1, max_overflow=0, timeout=5)
+    conn = pool.checkout(Connection)
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(pool.checkout(Connection)),
+    )
+    thread.start()
+    pool.checkin(conn)
+    thread.join()
+    assert results == [conn]
+
+
+def test_recycle():
+    pool = Pool(size=1, recycle=0)
+    conn = pool.checkout(Connection)
+    pool.checkin(conn)
+    assert pool.checkout(Connection) is not conn
+    assert conn.closed
+
+
+def test_pre_ping():
+    pool = Pool(size=1, pre_ping=True)
+    conn = pool.checkout(Connection)
+    pool.checkin(conn)
+    assert pool.checkout(Connection) is conn
+    pool.checkin(conn)
+    conn.broken = True
+    assert pool.checkout(Connection) is not conn
+    assert conn.closed
+
+
+def test_creator_failure():
+    pool = Pool(size=1, max_overflow=0, timeout=0.01)
+
+    def fail():
+        raise RuntimeError('cannot connect')
+
+    with pytest.raises(RuntimeError):
+        pool.checkout(fail)
+    assert pool.checkout(Connection)   # The slot is released.
+
+
+def test_dispose():
+    pool = Pool(size=2)
+    conn = pool.checkout(Connection)
+    pool.checkin(conn)
+    pool.dispose()
+    assert conn.closed
+    assert repr(pool) == '<Pool size=2 idle=0 open=0>'
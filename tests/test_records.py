@@ -1,6 +1,12 @@
+import array
+import copy
+
 import pytest
 
-from sqlian.records import Record, RecordCollection
+from sqlian.records import (
+    ForwardOnlyError, MultipleRecordsError,
+    Record, RecordCollection, RecordSchema,
+)
 
 
 @pytest.fixture
@@ -93,6 +99,22 @@ def test_record_values(record):
     assert (record.values()) == ('Mosky', 'Pinkoi', 'Python')
 
 
+def test_record_getitem_negative_index(record):
+    assert record[-1] == 'Python'
+
+
+def test_record_shared_schema(keys, values):
+    schema = RecordSchema(keys)
+    record = Record(schema, values)
+    assert record.keys() == ('name', 'occupation', 'main_language')
+    assert record == Record(keys, values)
+    assert not hasattr(record, '__dict__')
+
+
+def test_record_copy(record):
+    assert copy.copy(record) == record
+
+
 def test_record_items(record):
     assert dict(record.items()) == {
         'name': 'Mosky',
@@ -150,3 +172,206 @@ def test_collection_indexerror(collection):
     with pytest.raises(IndexError) as ctx:
         collection[2]
     assert str(ctx.value) == 'list index out of range'
+
+
+class FakeCursor(object):
+    """Cursor-like object without the iterator interface.
+    """
+    description = (('name',), ('occupation',))
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetch_calls = []
+        self.closed = False
+
+    def fetchone(self):
+        self.fetch_calls.append(1)
+        if self.rows:
+            return self.rows.pop(0)
+        return None
+
+    def fetchmany(self, size):
+        self.fetch_calls.append(size)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def cursor():
+    return FakeCursor(('Mosky', 'Pinkoi') for _ in range(5))
+
+
+def test_collection_from_cursor(cursor):
+    collection = RecordCollection.from_cursor(cursor)
+    assert len(collection) == 5
+    assert collection[4] == Record(('name', 'occupation'), ('Mosky', 'Pinkoi'))
+    assert cursor.fetch_calls == [1] * 6
+
+
+def test_collection_from_cursor_batch_size(cursor):
+    collection = RecordCollection.from_cursor(cursor, batch_size=2)
+    assert collection[0] == Record(('name', 'occupation'), ('Mosky', 'Pinkoi'))
+    assert cursor.fetch_calls == [2]
+    assert len(collection) == 5
+    assert cursor.fetch_calls == [2, 2, 2, 2]
+
+
+def test_collection_from_cursor_shares_schema(cursor):
+    first, second = RecordCollection.from_cursor(cursor)[:2]
+    assert first._schema is second._schema
+
+
+@pytest.fixture
+def stream(keys, record):
+    return RecordCollection(iter([
+        record,
+        Record(keys, ('Keith', 'iCHEF', 'Ruby')),
+    ]), stream=True)
+
+
+def test_stream_iter(keys, stream):
+    assert repr(stream) == '<RecordCollection (streaming, pending)>'
+    assert list(stream) == [
+        Record(keys, ('Mosky', 'Pinkoi', 'Python')),
+        Record(keys, ('Keith', 'iCHEF', 'Ruby')),
+    ]
+    assert repr(stream) == '<RecordCollection (streaming, consumed)>'
+    assert stream._resolved_rows == []
+
+
+def test_stream_iter_twice(stream):
+    for _ in stream:
+        break
+    with pytest.raises(ForwardOnlyError) as ctx:
+        iter(stream)
+    assert str(ctx.value) == (
+        'streaming record collection is already iterated; '
+        'it only supports iterating once'
+    )
+
+
+def test_stream_getitem(stream):
+    with pytest.raises(ForwardOnlyError) as ctx:
+        stream[0]
+    assert str(ctx.value) == (
+        'streaming record collection does not support indexing; '
+        'it only supports iterating once'
+    )
+
+
+def test_stream_len(stream):
+    with pytest.raises(ForwardOnlyError):
+        len(stream)
+    with pytest.raises(ForwardOnlyError):
+        bool(stream)
+
+
+def test_stream_from_cursor(cursor):
+    collection = RecordCollection.from_cursor(
+        cursor, batch_size=2, stream=True,
+    )
+    assert sum(1 for _ in collection) == 5
+
+
+class ColumnCursor(FakeCursor):
+    description = (('id',), ('score',), ('name',))
+
+
+def test_to_columns(cursor):
+    collection = RecordCollection.from_cursor(cursor)
+    columns = collection.to_columns(batch_size=2)
+    assert list(columns) == ['name', 'occupation']
+    assert columns['name'] == ['Mosky'] * 5
+    assert cursor.fetch_calls == [2, 2, 2, 2]
+    with pytest.raises(ForwardOnlyError):
+        iter(collection)
+
+
+def test_to_columns_numeric_widening():
+    cursor = ColumnCursor([
+        (1, 1, 'a'), (2, 2, 'b'),
+        (3, 2.5, 'c'), (2 ** 70, 3.5, None),
+    ])
+    columns = RecordCollection.from_cursor(cursor).to_columns(batch_size=2)
+    assert columns['id'] == [1, 2, 3, 2 ** 70]
+    assert isinstance(columns['score'], array.array)
+    assert columns['score'].typecode == 'd'
+    assert list(columns['score']) == [1.0, 2.0, 2.5, 3.5]
+    assert columns['name'] == ['a', 'b', 'c', None]
+
+
+def test_to_columns_resolved_rows():
+    cursor = ColumnCursor([(i, i, 'x') for i in range(5)])
+    collection = RecordCollection.from_cursor(cursor, batch_size=2)
+    assert collection[2].id == 2
+    columns = collection.to_columns()
+    assert isinstance(columns['id'], array.array)
+    assert list(columns['id']) == [0, 1, 2, 3, 4]
+
+
+def test_to_columns_resolved_collection(cursor):
+    collection = RecordCollection.from_cursor(cursor)
+    assert len(collection) == 5
+    assert collection.to_columns()['occupation'] == ['Pinkoi'] * 5
+    assert len(collection) == 5
+
+
+def test_to_columns_empty():
+    columns = RecordCollection.from_cursor(ColumnCursor([])).to_columns()
+    assert columns == {'id': [], 'score': [], 'name': []}
+
+
+def test_to_numpy():
+    numpy = pytest.importorskip('numpy')
+    cursor = ColumnCursor([(1, 1.5, 'a'), (2, 2.5, 'b')])
+    columns = RecordCollection.from_cursor(cursor).to_numpy()
+    assert columns['id'].dtype == numpy.int64
+    assert columns['score'].tolist() == [1.5, 2.5]
+    assert columns['name'].dtype == object
+
+
+def test_first(cursor):
+    collection = RecordCollection.from_cursor(cursor)
+    assert collection.first() == Record(
+        ('name', 'occupation'), ('Mosky', 'Pinkoi'),
+    )
+    assert cursor.fetch_calls == [1]
+    assert cursor.closed
+    assert len(collection) == 1
+
+
+def test_first_default():
+    collection = RecordCollection.from_cursor(FakeCursor([]))
+    assert collection.first(default=42) == 42
+
+
+def test_one(cursor):
+    collection = RecordCollection.from_cursor(cursor, batch_size=2)
+    with pytest.raises(MultipleRecordsError):
+        collection.one()
+    assert cursor.fetch_calls == [2]
+    assert cursor.closed
+
+
+def test_one_single():
+    cursor = FakeCursor([('Mosky', 'Pinkoi')])
+    assert RecordCollection.from_cursor(cursor).one().name == 'Mosky'
+    assert cursor.fetch_calls == [1, 1]
+    assert cursor.closed
+
+
+def test_scalar():
+    cursor = FakeCursor([('Mosky', 'Pinkoi')])
+    assert RecordCollection.from_cursor(cursor).scalar() == 'Mosky'
+    assert RecordCollection.from_cursor(FakeCursor([])).scalar(0) == 0
+
+
+def test_stream_first(cursor):
+    collection = RecordCollection.from_cursor(cursor, stream=True)
+    assert collection.first().name == 'Mosky'
+    assert cursor.closed
+    with pytest.raises(ForwardOnlyError):
+        collection.first()
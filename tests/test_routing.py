@@ -0,0 +1,263 @@
+import contextlib
+import heapq
+import threading
+
+import pytest
+
+from sqlian import (
+    ReplicatedDatabase, ShardedDatabase, UnsupportedParameterError, connect,
+)
+from sqlian.routing import SortKey
+
+
+@pytest.fixture
+def urls(tmpdir):
+    """Create a primary and two replicas, each with a row naming itself.
+    """
+    urls = []
+    for name in ['primary', 'replica1', 'replica2']:
+        url = 'sqlite:///{}'.format(tmpdir.join('{}.sqlite3'.format(name)))
+        with contextlib.closing(connect(url)) as db:
+            db.connection.execute('CREATE TABLE "source" ("name" TEXT)')
+            db.insert('source', values=(name,))
+            db.commit()
+        urls.append(url)
+    return urls
+
+
+def sources(db, count):
+    return [db.select('name', from_='source').scalar() for _ in range(count)]
+
+
+def test_connect(urls):
+    db = connect(urls[0], replicas=urls[1:])
+    assert isinstance(db, ReplicatedDatabase)
+    assert repr(db) == '<ReplicatedDatabase open=True replicas=2>'
+    assert sources(db, 4) == ['replica1', 'replica2', 'replica1', 'replica2']
+    db.close()
+    assert not db.is_open()
+    assert not any(r.is_open() for r in db.replicas)
+
+
+def test_writes_to_primary(urls):
+    db = connect(urls[0], replicas=urls[1:])
+    db.insert('source', values=('written',))
+    db.update('source', set={'name': 'updated'}, where={'name': 'written'})
+    db.commit()
+    assert db.primary.select('name', from_='source')[1].name == 'updated'
+    assert sources(db, 1) == ['replica1']
+    assert issubclass(db.IntegrityError, Exception)
+    db.close()
+
+
+def test_lazy_query(urls):
+    db = connect(urls[0], replicas=urls[1:])
+    query = db.select('name', from_='source', lazy=True)
+    assert len(query) == 1
+    assert query.first().name == 'replica2'
+    db.close()
+
+
+def test_transaction(urls):
+    db = connect(urls[0], replicas=urls[1:])
+    with db.transaction():
+        db.insert('source', values=('written',))
+        assert len(db.select('name', from_='source')) == 2
+    assert sources(db, 1) == ['replica1']
+    assert len(db.primary.select('name', from_='source')) == 2
+
+    with pytest.raises(ZeroDivisionError):
+        with db.transaction():
+            db.insert('source', values=('rolled back',))
+            1 / 0
+    assert len(db.primary.select('name', from_='source')) == 2
+    db.close()
+
+
+def test_transaction_per_thread(urls):
+    urls = [url + '?check_same_thread=false' for url in urls]
+    db = connect(urls[0], replicas=urls[1:])
+    seen = []
+    with db.transaction():
+        assert sources(db, 1) == ['primary']
+        thread = threading.Thread(target=lambda: seen.extend(sources(db, 1)))
+        thread.start()
+        thread.join()
+    assert seen == ['replica1']
+    db.close()
+
+
+def test_savepoint(urls):
+    db = connect(urls[0], replicas=urls[1:])
+    db.insert('source', values=[('row {}'.format(i),) for i in range(600)])
+    assert db.primary.connection.in_transaction
+    db.rollback()
+    assert len(db.primary.select('name', from_='source')) == 1
+    db.close()
+
+
+def test_sticky_after_write(urls, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('sqlian.routing.time.time', lambda: now[0])
+    db = connect(urls[0], replicas=urls[1:], sticky_after_write=5)
+    assert sources(db, 1) == ['replica1']
+    db.delete('source')
+    assert db.select('name', from_='source').first() is None
+    now[0] += 10
+    assert sources(db, 1) == ['replica2']
+    db.close()
+
+
+def test_least_loaded(urls):
+    db = connect(urls[0], replicas=urls[1:], replica_strategy='least_loaded')
+    db._loads[0] = 1   # As if a query is in progress on replica1.
+    assert sources(db, 2) == ['replica2', 'replica2']
+    db._loads[0] = 0
+    assert sources(db, 2) == ['replica1', 'replica2']
+    db.close()
+
+
+def test_invalid_strategy(urls):
+    with pytest.raises(UnsupportedParameterError):
+        connect(urls[0], replicas=urls[1:], replica_strategy='random')
+
+
+@pytest.fixture
+def sharded():
+    """Create a database of three in-memory shards, each with a table of
+    people sharded by ID modulo 3.
+    """
+    shards = []
+    for _ in range(3):
+        shard = connect('sqlite:///:memory:?check_same_thread=false')
+        shard.connection.execute(
+            'CREATE TABLE "person" ("id" INTEGER, "name" TEXT)',
+        )
+        shards.append(shard)
+    db = ShardedDatabase(shards, 'id', shard_function=lambda v: v % 3)
+    db.insert('person', columns=('id', 'name'), values=[
+        (i, name) for i, name in enumerate(['a', 'b', 'c', 'd', 'e', 'f', 'g'])
+    ])
+    yield db
+    db.close()
+
+
+def shard_ids(db):
+    return [
+        sorted(r.id for r in shard.select('id', from_='person'))
+        for shard in db.shards
+    ]
+
+
+def test_sharded_insert(sharded):
+    assert repr(sharded) == '<ShardedDatabase open=True shards=3>'
+    assert shard_ids(sharded) == [[0, 3, 6], [1, 4], [2, 5]]
+    sharded.insert('person', values={'id': 7, 'name': 'h'})
+    sharded.insert_many('person', values=[
+        {'id': 8, 'name': 'i'}, {'id': 9, 'name': 'j'},
+    ])
+    assert shard_ids(sharded) == [[0, 3, 6, 9], [1, 4, 7], [2, 5, 8]]
+    with pytest.raises(ValueError):
+        sharded.insert('person', values={'name': 'no id'})
+    assert issubclass(sharded.IntegrityError, Exception)
+
+
+def test_sharded_pinned(sharded, monkeypatch):
+    calls = []
+
+    def trace(index, shard):
+        def execute_query(statement_builder, args, kwargs):
+            calls.append(index)
+            return type(shard).execute_query(
+                shard, statement_builder, args, kwargs,
+            )
+        return execute_query
+
+    for index, shard in enumerate(sharded.shards):
+        monkeypatch.setattr(shard, 'execute_query', trace(index, shard))
+
+    records = sharded.select('name', from_='person', where={'id': 4})
+    assert records.scalar() == 'e'
+    assert calls == [1]
+
+    del calls[:]
+    records = sharded.select(
+        'name', from_='person', where={'id in': [3, 5, 6], 'name !=': 'g'},
+    )
+    assert sorted(r.name for r in records) == ['d', 'f']
+    assert calls == [0, 2]
+
+    del calls[:]
+    list(sharded.select('name', from_='person', where={'name': 'a'}))
+    assert calls == [0, 1, 2]
+
+
+def test_sharded_order_by(sharded):
+    records = sharded.select('id', from_='person', order_by=('id', 'desc'))
+    assert [r.id for r in records] == [6, 5, 4, 3, 2, 1, 0]
+    records = sharded.select(
+        'id', from_='person', order_by='id', limit=3, offset=2,
+    )
+    assert [r.id for r in records] == [2, 3, 4]
+    records = sharded.iterate('id', from_='person', order_by='id', offset=5)
+    assert [r.id for r in records] == [5, 6]
+
+
+def test_sharded_order_by_null(sharded, monkeypatch):
+    sharded.insert('person', values={'id': 7, 'name': None})
+    records = sharded.select('name', from_='person', order_by='name')
+    assert [r.name for r in records][:2] == [None, 'a']
+    records = sharded.select('name', from_='person', order_by='name desc')
+    assert [r.name for r in records][-2:] == ['a', None]
+
+    monkeypatch.setattr(sharded.engine, 'nulls_first', None)
+    with pytest.raises(ValueError):
+        sharded.select('name', from_='person', order_by='name')
+
+
+@pytest.mark.parametrize('nulls_first, descending, results, expected', [
+    (True, False, [[None, 1], [None, 2]], [None, None, 1, 2]),
+    (False, False, [[1, None], [2, None]], [1, 2, None, None]),
+    (True, True, [[1, None], [2, None]], [2, 1, None, None]),
+    (False, True, [[None, 1], [None, 2]], [None, None, 2, 1]),
+])
+def test_merge_nulls(nulls_first, descending, results, expected):
+    def keys(values):
+        return [SortKey([v], [descending], nulls_first, v) for v in values]
+
+    merged = heapq.merge(*(keys(r) for r in results))
+    assert [k.record for k in merged] == expected
+
+
+def test_sharded_lazy(sharded):
+    query = sharded.select('id', from_='person', order_by='id', lazy=True)
+    assert len(query) == 7
+    assert [r.id for r in query[1:3]] == [1, 2]
+    assert query.first().id == 0
+
+
+def test_sharded_writes(sharded):
+    sharded.update('person', set={'name': 'x'}, where={'id': 1})
+    sharded.delete('person', where={'id in': [0, 2]})
+    sharded.commit()
+    records = sharded.select('id', 'name', from_='person', order_by='id')
+    assert [(r.id, r.name) for r in records][:3] == [
+        (1, 'x'), (3, 'd'), (4, 'e'),
+    ]
+
+
+def test_sharded_no_connection(sharded):
+    with pytest.raises(TypeError):
+        sharded.connection
+    with pytest.raises(TypeError):
+        sharded.cursor()
+    with pytest.raises(TypeError):
+        sharded.server_side_cursor()
+    with pytest.raises(TypeError):
+        sharded.savepoint()
+
+
+def test_sharded_default_function(sharded):
+    db = ShardedDatabase(sharded.shards[:2], 'id')
+    assert db.shard_function('spam') == db.shard_function('spam')
+    assert set(db.shard_function(i) for i in range(20)) == {0, 1}